@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# RECON Ingest - Adaptive embed request sizing
+# AIMD control of texts/characters per embedder request from observed latency and errors
+
+import os
+import time
+from typing import List
+
+EMBED_TARGET_LATENCY = float(os.getenv("EMBED_TARGET_LATENCY", "2.0"))  # seconds per request to aim for
+EMBED_MAX_TEXTS = int(os.getenv("EMBED_MAX_TEXTS", "512"))
+EMBED_MAX_CHARS = int(os.getenv("EMBED_MAX_CHARS", "1000000"))
+EMBED_MIN_CHARS = 2000  # always room for one full chunk
+EMBED_STEP = int(os.getenv("EMBED_STEP", "4"))  # texts added per fast request
+EMBED_SLOW_FACTOR = 0.8  # shrink on a slow request
+EMBED_ERROR_FACTOR = 0.5  # shrink on a failed request
+EMBED_MIN_TIMEOUT = float(os.getenv("EMBED_MIN_TIMEOUT", "15"))
+EMBED_MAX_TIMEOUT = float(os.getenv("EMBED_MAX_TIMEOUT", "300"))
+EMBED_TIMEOUT_FACTOR = 4.0  # timeout = this many times the expected latency
+
+
+class AdaptiveBatchSizer:
+    """Additive-increase / multiplicative-decrease limits for embedder requests.
+
+    Requests that come back within the target latency grow the limits by a
+    few texts; slow requests shrink them gently and errors halve them. An
+    error that is not a sign of overload and came from a single text says
+    nothing about the window, so it leaves the limits alone. Only one
+    decrease is applied per round of in-flight requests, so concurrent
+    failures from the same overload do not collapse the window.
+    """
+
+    def __init__(self, texts: int, chars: int, target_latency: float = EMBED_TARGET_LATENCY):
+        self.max_texts = float(min(texts, EMBED_MAX_TEXTS))
+        self.max_chars = float(max(chars, EMBED_MIN_CHARS))
+        self.target_latency = target_latency
+        self.seconds_per_char = None  # EWMA of observed latency per character
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def texts_limit(self) -> int:
+        return max(1, int(self.max_texts))
+
+    @property
+    def chars_limit(self) -> int:
+        return int(self.max_chars)
+
+    def split(self, texts: List[str]) -> List[List[str]]:
+        """Cut texts into consecutive groups that respect the current limits."""
+        groups = []
+        group: List[str] = []
+        size = 0
+        for text in texts:
+            if group and (len(group) >= self.texts_limit or size + len(text) > self.chars_limit):
+                groups.append(group)
+                group, size = [], 0
+            group.append(text)
+            size += len(text)
+        if group:
+            groups.append(group)
+        return groups
+
+    def timeout(self, chars: int) -> float:
+        """Request timeout scaled to how long this many characters usually take."""
+        if self.seconds_per_char is None:
+            return EMBED_MAX_TIMEOUT
+        expected = self.seconds_per_char * chars
+        return min(EMBED_MAX_TIMEOUT, max(EMBED_MIN_TIMEOUT, EMBED_TIMEOUT_FACTOR * expected))
+
+    def success(self, texts: int, chars: int, latency: float, started: float):
+        self.requests += 1
+        rate = latency / max(chars, 1)
+        self.seconds_per_char = rate if self.seconds_per_char is None else 0.8 * self.seconds_per_char + 0.2 * rate
+
+        if latency > self.target_latency:
+            self.decrease(EMBED_SLOW_FACTOR, started)
+        elif texts >= self.texts_limit or chars >= self.chars_limit * 0.8:
+            # Only grow when the window was actually used
+            mean_chars = chars / max(texts, 1)
+            self.max_texts = min(self.max_texts + EMBED_STEP, EMBED_MAX_TEXTS)
+            self.max_chars = min(self.max_chars + EMBED_STEP * mean_chars, EMBED_MAX_CHARS)
+
+    def failure(self, texts: int, started: float, overload: bool):
+        """A failed request; overload is a timeout, 429 or 5xx rather than a problem with the input."""
+        self.requests += 1
+        self.failures += 1
+        if overload or texts > 1:
+            self.decrease(EMBED_ERROR_FACTOR, started)
+
+    def decrease(self, factor: float, started: float):
+        if started < self.last_decrease:
+            return  # sent before the last cut; that cut already accounts for it
+        self.max_texts = max(1.0, self.max_texts * factor)
+        self.max_chars = max(float(EMBED_MIN_CHARS), self.max_chars * factor)
+        self.last_decrease = time.monotonic()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# RECON Embedding benchmark
+# Encode throughput on a realistic mixed batch (repository chunks plus short queries): plain vs
+# length-bucketed, and optionally each inference runtime against fp32 torch
+
+import os
+import re
+import time
+import random
+import pathlib
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from bucketing import (
+    EMBED_MAX_BATCH, EMBED_TOKEN_BUDGET, encode_bucketed, padding_efficiency, token_buckets, token_lengths
+)
+from chunking import MODEL_CACHE, get_chunker
+from local_embedder import EMBED_MODEL_NAME
+from onnx_backend import RUNTIMES, load_encoder, parity
+
+SAMPLE_EXTENSIONS = {".py", ".ts", ".js", ".go", ".rs", ".java", ".md", ".yaml", ".yml", ".sh"}
+SKIP_DIRECTORIES = {"node_modules", ".git", "__pycache__", ".venv", "venv", "dist", "build", "target"}
+
+
+def sample_texts(repo: pathlib.Path, count: int, query_share: float, chunk_tokens: int, seed: int = 0) -> List[str]:
+    """Chunks from the repository mixed with short query-like strings, in shuffled arrival order."""
+    rng = random.Random(seed)
+    chunker = get_chunker(chunk_tokens, chunk_tokens // 8)
+    chunks: List[str] = []
+
+    for root, dirs, filenames in os.walk(repo):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRECTORIES]
+        for filename in filenames:
+            path = pathlib.Path(root) / filename
+            if path.suffix.lower() not in SAMPLE_EXTENSIONS or path.stat().st_size > 200_000:
+                continue
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            chunks.extend(text[start:end] for start, end in chunker.spans(text, path.suffix.lower()))
+        if len(chunks) >= count * 4:
+            break
+    if not chunks:
+        raise SystemExit(f"No sample files found under {repo}")
+
+    n_queries = int(count * query_share)
+    picked = [rng.choice(chunks) for _ in range(count - n_queries)]
+    words = [w for w in re.findall(r"[A-Za-z_]{4,}", " ".join(picked[:200]))] or ["ingest"]
+    queries = [f"how does {' '.join(rng.sample(words, min(len(words), rng.randint(1, 4))))} work"
+               for _ in range(n_queries)]
+
+    texts = picked + queries
+    rng.shuffle(texts)
+    return texts
+
+
+def time_encode(encode: Callable[[List[str]], np.ndarray], texts: List[str], rounds: int) -> Dict:
+    encode(texts[:8])  # warm up
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        vectors = encode(texts)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {"vectors": vectors, "seconds": best, "texts_per_s": len(texts) / best}
+
+
+def neighbor_overlap(reference: np.ndarray, vectors: np.ndarray, k: int = 10) -> float:
+    """Mean share of each text's top-k nearest neighbours that both embeddings agree on."""
+    k = min(k, len(reference) - 1)
+    if k < 1:
+        return 1.0
+    top_reference = np.argsort(-(reference @ reference.T), axis=1)[:, 1:k + 1]
+    top_vectors = np.argsort(-(vectors @ vectors.T), axis=1)[:, 1:k + 1]
+    return float(np.mean([len(set(a).intersection(b)) / k for a, b in zip(top_reference, top_vectors)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput on mixed batches")
+    parser.add_argument("--repo", default=".", help="Tree to sample chunks from")
+    parser.add_argument("--texts", type=int, default=512, help="Texts per batch")
+    parser.add_argument("--query-share", type=float, default=0.3, help="Fraction of short query texts")
+    parser.add_argument("--chunk-tokens", type=int, default=int(os.getenv("CHUNK_SIZE", "400")))
+    parser.add_argument("--batch-size", type=int, default=32, help="Rows per pass for the plain encode")
+    parser.add_argument("--token-budget", type=int, default=EMBED_TOKEN_BUDGET)
+    parser.add_argument("--max-batch", type=int, default=EMBED_MAX_BATCH)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--runtimes", default="",
+                        help=f"Comma-separated runtimes to compare with fp32 torch ({', '.join(RUNTIMES)})")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    import torch
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = SentenceTransformer(EMBED_MODEL_NAME, cache_folder=MODEL_CACHE, device="cpu")
+    texts = sample_texts(pathlib.Path(args.repo), args.texts, args.query_share, args.chunk_tokens)
+    lengths = token_lengths(model, texts)
+
+    print(f"📏 {len(texts)} texts, tokens min/median/max {min(lengths)}/{int(np.median(lengths))}/{max(lengths)}, "
+          f"{torch.get_num_threads()} threads")
+
+    # sentence-transformers sorts a call's texts by character length, then cuts fixed-size batches
+    by_chars = np.argsort([-len(text) for text in texts], kind="stable")
+    plain_batches = [by_chars[i:i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+    bucketed_batches = token_buckets(lengths, args.token_budget, args.max_batch)
+
+    plain = time_encode(lambda batch: model.encode(batch, batch_size=args.batch_size, normalize_embeddings=True,
+                                                   convert_to_numpy=True, show_progress_bar=False),
+                        texts, args.rounds)
+    bucketed = time_encode(lambda batch: encode_bucketed(model, batch, args.token_budget, args.max_batch),
+                           texts, args.rounds)
+
+    drift = 1 - np.sum(plain["vectors"] * bucketed["vectors"], axis=1)
+    for name, result, batches in (("plain", plain, plain_batches), ("bucketed", bucketed, bucketed_batches)):
+        print(f"   {name:<9} {result['texts_per_s']:>8.1f} texts/s  {len(batches):>4} passes  "
+              f"{padding_efficiency(lengths, batches):>6.1%} of padded tokens real")
+    print(f"⚡ Bucketed is {bucketed['texts_per_s'] / plain['texts_per_s']:.2f}x plain; "
+          f"max cosine drift {drift.max():.2e}")
+
+    runtimes = [runtime for runtime in args.runtimes.split(",") if runtime and runtime != "torch"]
+    if not runtimes:
+        return
+    print("🏁 Runtimes, bucketed, against fp32 torch:")
+    for runtime in runtimes:
+        encoder = load_encoder(model, EMBED_MODEL_NAME, MODEL_CACHE, runtime, args.threads)
+        if encoder is model:
+            continue  # failed its parity check; load_encoder said why
+        result = time_encode(lambda batch: encode_bucketed(encoder, batch, args.token_budget, args.max_batch),
+                             texts, args.rounds)
+        check = parity(bucketed["vectors"], result["vectors"])
+        print(f"   {runtime:<10} {result['texts_per_s']:>8.1f} texts/s  "
+              f"{result['texts_per_s'] / bucketed['texts_per_s']:.2f}x torch  "
+              f"cosine min {check['min_cosine']:.4f} mean {check['mean_cosine']:.4f}  "
+              f"top-10 overlap {neighbor_overlap(bucketed['vectors'], result['vectors']):.1%}")
+
+
+if __name__ == "__main__":
+    main()
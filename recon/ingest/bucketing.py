@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# RECON Embedding - Length-bucketed encoding
+# Groups texts of similar token length into forward passes sized by padded tokens, then restores input order
+
+import os
+from typing import List, Sequence
+
+import numpy as np
+
+EMBED_TOKEN_BUDGET = int(os.getenv("EMBED_TOKEN_BUDGET", "16384"))  # padded tokens (rows x longest row) per pass
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "128"))  # rows per pass, however short
+
+
+def token_lengths(model, texts: List[str]) -> List[int]:
+    """Token count of each text as the model will see it (special tokens included, truncated)."""
+    encoded = model.tokenizer(texts, add_special_tokens=True, truncation=True, max_length=model.max_seq_length)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def token_buckets(lengths: Sequence[int], token_budget: int = EMBED_TOKEN_BUDGET,
+                  max_batch: int = EMBED_MAX_BATCH) -> List[np.ndarray]:
+    """Index groups, longest first, whose padded size stays within token_budget.
+
+    Short queries end up many to a pass and long code chunks few to a pass,
+    so almost no row is padded far beyond its own length. Longest first
+    also means an out-of-memory error shows up on the first pass.
+    """
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind="stable")
+    buckets = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch, token_budget // longest))
+        buckets.append(order[start:start + size])
+        start += size
+    return buckets
+
+
+def padding_efficiency(lengths: Sequence[int], batches: List[Sequence[int]]) -> float:
+    """Real tokens over padded tokens for a batching of texts with these lengths."""
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches if len(batch))
+    return sum(lengths) / padded if padded else 1.0
+
+
+def encode_bucketed(model, texts: List[str], token_budget: int = EMBED_TOKEN_BUDGET,
+                    max_batch: int = EMBED_MAX_BATCH) -> np.ndarray:
+    """Normalized float32 embeddings in input order, one forward pass per length bucket."""
+    vectors = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    if not texts:
+        return vectors
+
+    for indices in token_buckets(token_lengths(model, texts), token_budget, max_batch):
+        vectors[indices] = model.encode(
+            [texts[i] for i in indices],
+            batch_size=len(indices),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+    return vectors
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# RECON Ingest - Run checkpoints
+# Append-only log of files whose chunks have all landed, so an interrupted run can resume
+
+import os
+import json
+import pathlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+CHECKPOINT_VERSION = 1
+
+
+def default_checkpoint_path(manifest_path: pathlib.Path) -> pathlib.Path:
+    """Checkpoint log kept next to the manifest it will be folded into."""
+    return pathlib.Path(manifest_path).with_suffix(".checkpoint.jsonl")
+
+
+class CheckpointState:
+    """What an interrupted run had finished, read back from its log."""
+
+    def __init__(self, header: Dict):
+        self.header = header
+        self.completed: Dict[str, Dict] = {}  # path -> {"hash", "chunk_ids", "stale"}
+        self.retry: Set[str] = set()
+
+    @property
+    def full(self) -> bool:
+        return bool(self.header.get("full"))
+
+    def matches(self, collection: str, repo_root: pathlib.Path) -> bool:
+        return (self.header.get("version") == CHECKPOINT_VERSION
+                and self.header.get("collection") == collection
+                and self.header.get("repo") == str(pathlib.Path(repo_root).resolve()))
+
+    def stale_ids(self) -> List[str]:
+        return [chunk_id for entry in self.completed.values() for chunk_id in entry.get("stale", [])]
+
+
+def load_checkpoint(path: pathlib.Path) -> Optional[CheckpointState]:
+    """Replay a checkpoint log; a torn last line from a crash is ignored."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return None
+
+    state = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if state is None:
+                state = CheckpointState(record)
+            elif "done" in record:
+                state.completed[record["done"]] = record
+                state.retry.discard(record["done"])
+            elif "retry" in record:
+                state.retry.add(record["retry"])
+    return state
+
+
+class IngestCheckpoint:
+    """Tracks outstanding chunks per file and logs each file as soon as all of them are stored."""
+
+    def __init__(self, path: pathlib.Path, collection: str, repo_root: pathlib.Path,
+                 full: bool = False, append: bool = False):
+        self.path = pathlib.Path(path)
+        self.outstanding: Dict[str, int] = {}
+        self.pending: Dict[str, Tuple[str, List[str], List[str]]] = {}
+        self.completed = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        append = append and self.path.exists()
+        self.log = open(self.path, "a" if append else "w", encoding="utf-8")
+        if not append:
+            self.write({
+                "version": CHECKPOINT_VERSION,
+                "collection": collection,
+                "repo": str(pathlib.Path(repo_root).resolve()),
+                "full": full
+            })
+
+    def write(self, record: Dict):
+        self.log.write(json.dumps(record) + "\n")
+        self.log.flush()
+
+    def expect(self, relative_path: str, file_hash: str, chunk_ids: List[str], stale_ids: List[str]):
+        """Register a file's chunks before they are queued for upload."""
+        self.pending[relative_path] = (file_hash, chunk_ids, stale_ids)
+        self.outstanding[relative_path] = len(chunk_ids)
+        if not chunk_ids:
+            self.finish(relative_path)
+
+    def uploaded(self, paths: Iterable[str]):
+        """Count stored chunks (one path per point) and log files that are now complete."""
+        for relative_path in paths:
+            if relative_path in self.outstanding:
+                self.outstanding[relative_path] -= 1
+                if self.outstanding[relative_path] <= 0:
+                    self.finish(relative_path)
+
+    def finish(self, relative_path: str):
+        file_hash, chunk_ids, stale_ids = self.pending.pop(relative_path)
+        del self.outstanding[relative_path]
+        self.write({"done": relative_path, "hash": file_hash, "chunk_ids": chunk_ids, "stale": stale_ids})
+        self.completed += 1
+
+    def failed(self, paths: Iterable[str]):
+        """Queue files for the next attempt after their batches ran out of retries."""
+        for relative_path in sorted(set(paths)):
+            self.write({"retry": relative_path})
+
+    def close(self, remove: bool = False):
+        if self.log.closed:
+            return
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        self.log.close()
+        if remove:
+            self.path.unlink(missing_ok=True)
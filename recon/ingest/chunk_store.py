@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# RECON Chunk Store - compressed, content-addressed chunk text outside Qdrant
+# Shared by the ingestor (single writer) and the retriever (readers fetching top-k text)
+
+import os
+import mmap
+import zlib
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_ENTRY = struct.Struct("<32sQI")  # sha256 digest, record offset, record length
+DIGEST_SIZE = 32
+TAIL_LIMIT = 10000  # unsorted recent entries kept in a dict before the sorted index is rebuilt
+COMPRESS_LEVEL = 6
+
+
+class ChunkStore:
+    """Append-only store of zlib-compressed chunk texts keyed by their text_hash.
+
+    <path>.dat holds records of (digest, compressed text); <path>.idx holds
+    fixed-size (digest, offset, length) entries appended after the data is
+    flushed, so a reader never sees an entry whose record is incomplete.
+    Readers memory-map the data file and pick up new entries as the writer
+    appends them.
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        self.data_path = f"{path}.dat"
+        self.index_path = f"{path}.idx"
+        self.writable = writable
+        self.lock = threading.Lock()
+
+        # Sorted index on the first 8 digest bytes, plus recent entries by full digest
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.offsets = np.empty(0, dtype=np.uint64)
+        self.lengths = np.empty(0, dtype=np.uint32)
+        self.tail: Dict[bytes, Tuple[int, int]] = {}
+        self.index_read = 0  # bytes of the index file consumed so far
+        self.view: Optional[mmap.mmap] = None
+        self.data_file = None
+        self.index_file = None
+
+        if writable:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.data_file = open(self.data_path, "ab")
+            self.index_file = open(self.index_path, "ab")
+            torn = self.index_file.tell() % INDEX_ENTRY.size
+            if torn:  # drop a half-written entry left by a crash so appends stay aligned
+                self.index_file.truncate(self.index_file.tell() - torn)
+                self.index_file.seek(0, os.SEEK_END)
+        self.refresh()
+
+    @property
+    def count(self) -> int:
+        return len(self.keys) + len(self.tail)
+
+    def refresh(self):
+        """Load index entries appended since the last call."""
+        try:
+            size = os.path.getsize(self.index_path)
+        except OSError:
+            return
+        size -= size % INDEX_ENTRY.size  # ignore a half-written trailing entry
+        if size <= self.index_read:
+            return
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self.index_read)
+            raw = f.read(size - self.index_read)
+        self.index_read = size
+
+        for digest, offset, length in INDEX_ENTRY.iter_unpack(raw):
+            self.tail[digest] = (offset, length)
+        if len(self.tail) > TAIL_LIMIT:
+            self.compact()
+
+    def compact(self):
+        """Fold the tail into the sorted arrays."""
+        digests = list(self.tail)
+        keys = np.frombuffer(b"".join(d[:8] for d in digests), dtype="<u8")
+        offsets = np.fromiter((self.tail[d][0] for d in digests), dtype=np.uint64, count=len(digests))
+        lengths = np.fromiter((self.tail[d][1] for d in digests), dtype=np.uint32, count=len(digests))
+
+        keys = np.concatenate([self.keys, keys])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.offsets = np.concatenate([self.offsets, offsets])[order]
+        self.lengths = np.concatenate([self.lengths, lengths])[order]
+        self.tail = {}
+
+    def locate(self, digest: bytes) -> Optional[Tuple[int, int]]:
+        if digest in self.tail:
+            return self.tail[digest]
+
+        key = np.frombuffer(digest[:8], dtype="<u8")[0]
+        lo = np.searchsorted(self.keys, key, side="left")
+        hi = np.searchsorted(self.keys, key, side="right")
+        for i in range(lo, hi):  # 64-bit prefix collisions are resolved against the record
+            offset, length = int(self.offsets[i]), int(self.lengths[i])
+            if self.read(offset, DIGEST_SIZE) == digest:
+                return offset, length
+        return None
+
+    def read(self, offset: int, length: int) -> bytes:
+        end = offset + length
+        if self.view is None or end > len(self.view):
+            if self.data_file:
+                self.data_file.flush()
+            if self.view is not None:
+                self.view.close()
+            with open(self.data_path, "rb") as f:
+                self.view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.view[offset:end]
+
+    def get_many(self, text_hashes: List[str]) -> List[Optional[str]]:
+        """Chunk texts in input order, None for unknown hashes."""
+        results: List[Optional[str]] = []
+        with self.lock:
+            self.refresh()
+            for text_hash in text_hashes:
+                location = self.locate(bytes.fromhex(text_hash))
+                if location is None:
+                    results.append(None)
+                    continue
+                offset, length = location
+                record = self.read(offset, length)
+                results.append(zlib.decompress(record[DIGEST_SIZE:]).decode("utf-8"))
+        return results
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """Append (text_hash, text) pairs not already stored; returns how many were new."""
+        if not self.writable:
+            raise RuntimeError("Chunk store was opened read-only")
+
+        with self.lock:
+            self.refresh()
+            offset = self.data_file.tell()
+            entries = []
+            seen = set()
+            for text_hash, text in items:
+                digest = bytes.fromhex(text_hash)
+                if digest in seen or self.locate(digest) is not None:
+                    continue
+                seen.add(digest)
+                record = digest + zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+                self.data_file.write(record)
+                entries.append((digest, offset, len(record)))
+                offset += len(record)
+
+            if entries:
+                # Data first, then the index entries that point at it
+                self.data_file.flush()
+                self.index_file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in entries))
+                self.index_file.flush()
+                for digest, record_offset, length in entries:
+                    self.tail[digest] = (record_offset, length)
+                self.index_read += len(entries) * INDEX_ENTRY.size
+                if len(self.tail) > TAIL_LIMIT:
+                    self.compact()
+        return len(entries)
+
+    def stats(self) -> dict:
+        return {
+            "chunks": self.count,
+            "bytes": os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        }
+
+    def close(self):
+        with self.lock:
+            if self.view is not None:
+                self.view.close()
+                self.view = None
+            for f in (self.data_file, self.index_file):
+                if f:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+            self.data_file = self.index_file = None
+
+
+def open_chunk_store(path: str, writable: bool = False) -> Optional[ChunkStore]:
+    """Open the store at path, or return None when chunk text stays in Qdrant payloads."""
+    if not path:
+        return None
+    return ChunkStore(path, writable)
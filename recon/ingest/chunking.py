@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# RECON Ingest - Chunking engine
+# Token-accurate chunk boundaries expressed as character offsets into the source text
+
+import os
+import re
+import ast
+import bisect
+import functools
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+TOKENIZER_NAME = os.getenv("TOKENIZER_NAME", "BAAI/bge-small-en-v1.5")
+CHUNKER = os.getenv("CHUNKER", "tokens")  # "tokens" (embedder tokenizer) or "words"
+MODEL_CACHE = os.getenv("MODEL_CACHE", None)
+SEGMENT_CHARS = 4096  # texts are tokenized as a batch of line-aligned segments
+SYNTAX_CHUNKING = os.getenv("SYNTAX_CHUNKING", "1") == "1"
+
+PYTHON_EXTENSIONS = {".py"}
+BRACE_EXTENSIONS = {
+    ".ts", ".tsx", ".js", ".java", ".go", ".rs", ".cs",
+    ".cpp", ".h", ".hpp", ".c", ".ps1"
+}
+
+Span = Tuple[int, int]
+
+
+def window_spans(offsets: List[Span], chunk_size: int, overlap: int) -> List[Span]:
+    """Slide a chunk_size-unit window with overlap over unit offsets; return character spans."""
+    spans = []
+    start = 0
+
+    while start < len(offsets):
+        end = min(start + chunk_size, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+
+        if end == len(offsets):
+            break
+
+        # Move start position with overlap
+        start = max(end - overlap, start + 1)
+
+    return spans
+
+
+def split_segments(text: str, size: int = SEGMENT_CHARS) -> List[Tuple[int, str]]:
+    """Cut text into roughly size-char pieces on line boundaries, keeping their start offsets."""
+    segments = []
+    start = 0
+
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        segments.append((start, text[start:end]))
+        start = end
+
+    return segments
+
+
+class WordChunker:
+    """Whitespace-word chunker; the fallback when no tokenizer is available."""
+
+    unit = "words"
+
+    def __init__(self, chunk_size: int, overlap: int):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def offsets(self, text: str) -> List[Span]:
+        return [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]
+
+    def count(self, text: str) -> int:
+        return len(self.offsets(text))
+
+    def spans(self, text: str, extension: str = "") -> List[Span]:
+        offsets = self.offsets(text)
+        if SYNTAX_CHUNKING:
+            units = code_units(text, extension)
+            if units is not None:
+                return pack_units(text, units, offsets, self.chunk_size, self.overlap)
+        return window_spans(offsets, self.chunk_size, self.overlap)
+
+
+class TokenChunker(WordChunker):
+    """Chunker that counts units with the embedder's own fast tokenizer."""
+
+    unit = "tokens"
+
+    def __init__(self, chunk_size: int, overlap: int, tokenizer_name: str = TOKENIZER_NAME):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, cache_dir=MODEL_CACHE, use_fast=True)
+        if not self.tokenizer.is_fast:
+            raise RuntimeError(f"{tokenizer_name} has no fast tokenizer; offsets are unavailable")
+
+        # Leave room for [CLS]/[SEP] so no chunk is truncated at embed time
+        limit = self.tokenizer.model_max_length - self.tokenizer.num_special_tokens_to_add()
+        super().__init__(min(chunk_size, limit), min(overlap, limit // 2))
+
+    def offsets(self, text: str) -> List[Span]:
+        segments = split_segments(text)
+        if not segments:
+            return []
+
+        encoded = self.tokenizer(
+            [segment for _, segment in segments],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+
+        offsets = []
+        for (base, _), segment_offsets in zip(segments, encoded["offset_mapping"]):
+            offsets.extend((base + start, base + end) for start, end in segment_offsets if end > start)
+        return offsets
+
+
+class Unit(NamedTuple):
+    """A syntactic block as a [first, last) line range; children() splits it one level down."""
+    first: int
+    last: int
+    children: Callable[[], List["Unit"]]
+
+
+def _no_children() -> List[Unit]:
+    return []
+
+
+def split_lines(text: str) -> List[str]:
+    """Lines with their endings, split on \\n only so indices match ast line numbers."""
+    return re.findall(r"[^\n]*\n|[^\n]+$", text)
+
+
+def code_units(text: str, extension: str) -> Optional[List[Unit]]:
+    """Top-level definition units for code files, or None to use plain windows."""
+    lines = split_lines(text)
+    if extension in PYTHON_EXTENSIONS:
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            return None
+        return _python_units(tree.body, 0, len(lines), lines)
+    if extension in BRACE_EXTENSIONS:
+        depths = _brace_depths(lines)
+        return _brace_units(lines, depths, 0, len(lines), 0)
+    return None
+
+
+def _python_units(body: List[ast.stmt], first: int, last: int, lines: List[str]) -> List[Unit]:
+    """One unit per statement; definitions take their decorators and leading comments along
+    and split into their body statements when they are too big for one chunk."""
+    starts = []
+    for node in body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+        floor = starts[-1] + 1 if starts else first
+        while start - 1 >= floor and lines[start - 1].lstrip().startswith("#"):
+            start -= 1
+        starts.append(max(start, first))
+
+    units = []
+    if starts and starts[0] > first:
+        units.append(Unit(first, starts[0], _no_children))
+
+    for idx, node in enumerate(body):
+        end = starts[idx + 1] if idx + 1 < len(body) else last
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            inner = node.body
+            units.append(Unit(starts[idx], end, lambda inner=inner, s=starts[idx], e=end:
+                              _python_units(inner, s, e, lines)))
+        else:
+            units.append(Unit(starts[idx], end, _no_children))
+    return units
+
+
+# Strings, line and one-line block comments, and '#' comments or preprocessor lines
+# ('#' followed by a space or a directive, so JS private names like this.#x keep their braces)
+_BRACE_NOISE = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*|/\*.*?\*/'
+    r'|#(?:\s|$|!|(?:include|define|undef|if|ifdef|ifndef|elif|else|endif|pragma|error|region|endregion)\b).*'
+)
+
+
+def _brace_depths(lines: List[str]) -> List[Tuple[int, int]]:
+    """Per line: (brace depth after the line, deepest depth reached on it)."""
+    depths = []
+    depth = 0
+    in_comment = False  # inside a /* ... */ spanning lines
+    for line in lines:
+        peak = depth
+        if in_comment:
+            close = line.find("*/")
+            if close < 0:
+                depths.append((depth, peak))
+                continue
+            line = line[close + 2:]
+            in_comment = False
+        code = _BRACE_NOISE.sub("", line)
+        if "/*" in code:
+            code = code[:code.index("/*")]
+            in_comment = True
+        for ch in code:
+            if ch == "{":
+                depth += 1
+                peak = max(peak, depth)
+            elif ch == "}":
+                depth = max(depth - 1, 0)
+        depths.append((depth, peak))
+    return depths
+
+
+def _brace_units(lines: List[str], depths: List[Tuple[int, int]], first: int, last: int, level: int) -> List[Unit]:
+    """Split lines at points where a block closes back to `level`, or at blank lines between statements."""
+    units = []
+    start = first
+    opened = False
+
+    for i in range(first, last):
+        after, peak = depths[i]
+        opened = opened or peak > level
+        if after <= level and (opened or not lines[i].strip()):
+            units.append(Unit(start, i + 1, (lambda s=start, e=i + 1:
+                                             _brace_units(lines, depths, s, e, level + 1))
+                              if opened else _no_children))
+            start = i + 1
+            opened = False
+
+    if start < last:
+        units.append(Unit(start, last, _no_children))
+    return units
+
+
+def pack_units(text: str, units: List[Unit], offsets: List[Span], chunk_size: int, overlap: int) -> List[Span]:
+    """Greedily pack consecutive units into chunks of at most chunk_size tokens.
+
+    Units that are too big on their own are split one syntactic level down,
+    then into lines; only single lines that still do not fit fall back to
+    overlapping windows.
+    """
+    if not offsets:
+        return []
+
+    line_starts = [0]
+    for line in split_lines(text):
+        line_starts.append(line_starts[-1] + len(line))
+    token_starts = [start for start, _ in offsets]
+
+    def token_range(unit: Unit) -> Tuple[int, int]:
+        begin = bisect.bisect_left(token_starts, line_starts[unit.first])
+        end = bisect.bisect_left(token_starts, line_starts[unit.last])
+        return begin, end
+
+    # Flatten into leaves that fit the budget; oversized leaves become windows
+    leaves: List[Tuple[int, int]] = []
+    windows: List[Span] = []
+
+    def flatten(level_units: List[Unit]):
+        for unit in level_units:
+            begin, end = token_range(unit)
+            if begin == end:
+                continue
+            if end - begin <= chunk_size:
+                leaves.append((begin, end))
+                continue
+            children = unit.children()
+            if len(children) <= 1 and unit.last - unit.first > 1:
+                children = [Unit(line, line + 1, _no_children) for line in range(unit.first, unit.last)]
+            if len(children) > 1:
+                flatten(children)
+            else:
+                windows.extend(window_spans(offsets[begin:end], chunk_size, overlap))
+                leaves.append((end, end))  # barrier: nothing packs across a windowed line
+
+    flatten(units)
+
+    # Next-fit packing of contiguous leaves is optimal for chunk count
+    ranges: List[Tuple[int, int]] = []
+    current = None
+    for begin, end in leaves:
+        if current and begin == current[1] and end - current[0] <= chunk_size:
+            current = (current[0], end)
+        else:
+            if current:
+                ranges.append(current)
+            current = (begin, end) if begin < end else None
+    if current:
+        ranges.append(current)
+
+    spans = [(offsets[begin][0], offsets[end - 1][1]) for begin, end in ranges] + windows
+    return sorted(spans)
+
+
+@functools.lru_cache(maxsize=None)
+def get_chunker(chunk_size: int, overlap: int) -> WordChunker:
+    """Per-process chunker; loads the tokenizer once.
+
+    Word chunks only happen when CHUNKER=words asks for them: a silent
+    fallback would write chunks the embedder truncates, under a manifest
+    signature that claims tokens, and could differ between pool workers.
+    """
+    if CHUNKER == "words":
+        return WordChunker(chunk_size, overlap)
+    if CHUNKER != "tokens":
+        raise ValueError(f"Unknown CHUNKER {CHUNKER!r} (choose tokens or words)")
+    try:
+        return TokenChunker(chunk_size, overlap)
+    except Exception as e:
+        raise RuntimeError(f"Tokenizer {TOKENIZER_NAME} unavailable ({e}); "
+                           f"set CHUNKER=words to chunk by whitespace words instead") from e
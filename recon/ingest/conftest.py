@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# RECON Ingest - Test fixtures
+# Word chunking, an in-memory Qdrant and a deterministic fake embedder, so tests need no model or services
+
+import os
+
+os.environ["CHUNKER"] = "words"  # read at import time by chunking.py
+os.environ["GIT_DELTA"] = "1"
+
+import hashlib
+import pathlib
+from typing import List
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+import ingest
+
+DIMENSION = 8
+
+
+def fake_vectors(texts: List[str]) -> np.ndarray:
+    """Unit vectors derived from each text's hash."""
+    vectors = np.array([
+        np.frombuffer(hashlib.sha256(text.encode()).digest()[:DIMENSION], dtype=np.uint8).astype(np.float32) + 1
+        for text in texts
+    ], dtype=np.float32).reshape(len(texts), DIMENSION)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def qdrant():
+    return QdrantClient(":memory:")
+
+
+@pytest.fixture
+def make_ingestor(tmp_path, qdrant, monkeypatch):
+    """Factory for ingestors sharing one in-memory Qdrant, keeping state under tmp_path/state."""
+    monkeypatch.setattr(ingest, "QdrantClient", lambda url: qdrant)
+    monkeypatch.setattr(ingest, "RETRY_BACKOFF", 0.001)
+    state_dir = tmp_path / "state"
+    embedded: List[str] = []
+
+    def make(collection: str = "test", **kwargs) -> ingest.RepositoryIngestor:
+        kwargs.setdefault("manifest_path", state_dir / f"{collection}.manifest.json")
+        kwargs.setdefault("embed_cache_path", "")
+        kwargs.setdefault("chunk_store_path", "")
+        ingestor = ingest.RepositoryIngestor("http://qdrant:6333", "http://embedder:8081/embed", collection, **kwargs)
+
+        async def fetch_embeddings(texts: List[str]) -> np.ndarray:
+            embedded.extend(texts)
+            return fake_vectors(texts)
+
+        ingestor.fetch_embeddings = fetch_embeddings
+        return ingestor
+
+    make.embedded = embedded
+    return make
+
+
+def write_files(root: pathlib.Path, files: dict):
+    for relative_path, content in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def stored_paths(qdrant: QdrantClient, collection: str = "test") -> List[str]:
+    records, _ = qdrant.scroll(collection_name=collection, limit=10000, with_payload=True)
+    return sorted({record.payload["path"] for record in records})
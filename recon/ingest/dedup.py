@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# RECON Ingest - Content-addressed chunk deduplication
+# Each unique chunk text is embedded once per run; duplicates reuse its vector
+
+import os
+import array
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+DEDUP_CACHE_SIZE = int(os.getenv("DEDUP_CACHE_SIZE", "20000"))  # vectors remembered per run
+
+
+def text_hash(text: str) -> str:
+    """Content address of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class EmbeddingDeduper:
+    """Tracks which chunk texts are embedded, in flight, or still unseen.
+
+    The batcher claims each hash as it forms batches; only the first claim of
+    a hash sends its text to the embedder, later points wait on (or reuse)
+    that result through the future their claim returned. Finished vectors
+    are kept compactly in a bounded LRU.
+    """
+
+    def __init__(self, capacity: int = DEDUP_CACHE_SIZE):
+        self.capacity = capacity
+        self.vectors: "OrderedDict[str, array.array]" = OrderedDict()
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.unique = 0
+        self.duplicates = 0
+
+    def claim(self, chunk_hash: str) -> Tuple[bool, asyncio.Future]:
+        """Whether the caller must embed this text, and a future of its vector.
+
+        The future carries the vector itself, so a point that claimed a hash
+        still gets its vector after the LRU has evicted it.
+        """
+        if chunk_hash in self.vectors:
+            self.vectors.move_to_end(chunk_hash)
+            self.duplicates += 1
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(self.vectors[chunk_hash])
+            return False, future
+        if chunk_hash in self.pending:
+            self.duplicates += 1
+            return False, self.pending[chunk_hash]
+
+        future = self.pending[chunk_hash] = asyncio.get_running_loop().create_future()
+        self.unique += 1
+        return True, future
+
+    def resolve(self, chunk_hash: str, vector: List[float]):
+        stored = self.vectors[chunk_hash] = array.array("f", vector)
+        while len(self.vectors) > self.capacity:
+            self.vectors.popitem(last=False)
+
+        future = self.pending.pop(chunk_hash, None)
+        if future and not future.done():
+            future.set_result(stored)
+
+    def fail(self, chunk_hashes: Iterable[str], error: BaseException):
+        for chunk_hash in chunk_hashes:
+            future = self.pending.pop(chunk_hash, None)
+            if future and not future.done():
+                future.set_exception(error)
+                future.exception()  # mark retrieved; waiters (if any) still see it
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# RECON Embedding Cache - persistent (model, text) -> vector store
+# Shared by the ingestor and the retriever so text is only ever embedded once
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import List, Optional, Set
+
+import numpy as np
+
+EMBED_CACHE_MAX = int(os.getenv("EMBED_CACHE_MAX", "200000"))  # entries (~1.5 KB each at 384 dims)
+EVICT_SLACK = 0.1  # evict down to max once the cache grows 10% past it
+
+
+def cache_key(model: str, text: str) -> bytes:
+    """Key on the model and a hash of the normalized text."""
+    normalized = unicodedata.normalize("NFC", text).strip()
+    return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8", errors="ignore")).digest()
+
+
+class EmbeddingCache:
+    """SQLite-backed vector cache storing float32 blobs with LRU eviction."""
+
+    def __init__(self, path: str, model: str, max_entries: int = EMBED_CACHE_MAX):
+        self.path = path
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors(last_used)")
+        self.size = self.db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached vectors in input order, None for misses."""
+        keys = [cache_key(self.model, text) for text in texts]
+        found = {}
+
+        with self.lock:
+            for i in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+                chunk = keys[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self.db.execute("BEGIN")
+                self.db.executemany("UPDATE vectors SET last_used = ? WHERE key = ?",
+                                    [(now, key) for key in found])
+                self.db.execute("COMMIT")
+
+        results = []
+        for key in keys:
+            blob = found.get(key)
+            results.append(np.frombuffer(blob, dtype="<f4").tolist() if blob is not None else None)
+
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def cached_keys(self, keys: List[bytes]) -> Set[bytes]:
+        """Which cache_key()s are present, without touching hit counts or LRU order."""
+        found: Set[bytes] = set()
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                found.update(row[0] for row in self.db.execute(
+                    f"SELECT key FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ))
+        return found
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        now = time.time()
+        rows = [
+            (cache_key(self.model, text), np.asarray(vector, dtype="<f4").tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self.lock:
+            self.db.execute("BEGIN")
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO vectors (key, vector, last_used) VALUES (?, ?, ?)", rows)
+            inserted = self.db.total_changes - before
+            if inserted < len(rows):
+                # Some keys were already cached (or repeated); refresh those without counting them again
+                self.db.executemany("UPDATE vectors SET vector = ?, last_used = ? WHERE key = ?",
+                                    [(vector, used, key) for key, vector, used in rows])
+            self.db.execute("COMMIT")
+            self.size += inserted
+
+            if self.size > self.max_entries * (1 + EVICT_SLACK):
+                self.evict()
+
+    def evict(self):
+        """Drop least recently used entries down to max_entries (caller holds the lock)."""
+        self.size = self.db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        excess = self.size - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.size -= excess
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self.size
+        }
+
+    def close(self):
+        self.db.close()
+
+
+def open_cache(model: str, path: str) -> Optional[EmbeddingCache]:
+    """Open the cache at path, or return None when caching is disabled."""
+    if not path:
+        return None
+    return EmbeddingCache(path, model)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# RECON Ingest - Shared embedder access for concurrent jobs
+# One connection pool, cache and batch sizer, with a global in-flight cap handed out round-robin per job
+
+import os
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+import httpx
+
+from batch_sizing import AdaptiveBatchSizer
+from chunk_store import ChunkStore
+from embed_cache import EmbeddingCache
+from local_embedder import LocalEmbedder
+
+EMBED_INFLIGHT = int(os.getenv("EMBED_INFLIGHT", "4"))  # embed requests in flight across all jobs
+
+
+class FairLimiter:
+    """Caps concurrent holders and grants waiting slots round-robin by job.
+
+    A job with thousands of batches queued only gets its turn in the
+    rotation, so a small repository finishes in about the time its own
+    batches take instead of waiting behind the large one.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self.turns: Deque[str] = deque()  # jobs with waiters, in the order they are served
+        self.granted: Dict[str, int] = {}
+
+    async def acquire(self, job: str):
+        if self.in_flight < self.limit and not self.turns:
+            self.take(job)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        if job not in self.waiters:
+            self.waiters[job] = deque()
+            self.turns.append(job)
+        self.waiters[job].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # granted just as we were cancelled; pass it on
+            else:
+                self.forget(job, waiter)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        while self.in_flight < self.limit and self.turns:
+            job = self.turns.popleft()
+            queue = self.waiters[job]
+            waiter = queue.popleft()
+            if queue:
+                self.turns.append(job)  # back of the line behind the other jobs
+            else:
+                del self.waiters[job]
+            if not waiter.done():
+                self.take(job)
+                waiter.set_result(None)
+
+    def take(self, job: str):
+        self.in_flight += 1
+        self.granted[job] = self.granted.get(job, 0) + 1
+
+    def forget(self, job: str, waiter: asyncio.Future):
+        queue = self.waiters.get(job)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self.waiters[job]
+            self.turns.remove(job)
+
+
+class EmbedPool:
+    """Embedder resources shared by every ingestor in a multi-repository run.
+
+    Owns the HTTP session (or in-process model), the embedding cache, the
+    chunk store and the batch sizer, since all jobs talk to the same
+    embedder and store content-addressed data. Ingestors given a pool use
+    these instead of opening their own and leave closing them to the pool.
+    """
+
+    def __init__(self, embed_cache: Optional[EmbeddingCache], chunk_store: Optional[ChunkStore],
+                 batch_sizer: AdaptiveBatchSizer, local_embedder: Optional[LocalEmbedder] = None,
+                 inflight: int = EMBED_INFLIGHT):
+        self.embed_cache = embed_cache
+        self.chunk_store = chunk_store
+        self.batch_sizer = batch_sizer
+        self.local_embedder = local_embedder
+        self.limiter = FairLimiter(inflight)
+        self.session: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self):
+        # Enough pooled connections for every in-flight request plus health checks
+        limits = httpx.Limits(max_connections=self.limiter.limit + 2, max_keepalive_connections=self.limiter.limit)
+        self.session = httpx.AsyncClient(timeout=120, limits=limits)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.aclose()
+        if self.embed_cache:
+            self.embed_cache.close()
+        if self.chunk_store:
+            self.chunk_store.close()
+
+    @asynccontextmanager
+    async def slot(self, job: str) -> AsyncIterator[None]:
+        """Hold one of the global in-flight embed slots for the duration of a request."""
+        await self.limiter.acquire(job)
+        try:
+            yield
+        finally:
+            self.limiter.release()
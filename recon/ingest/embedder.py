@@ -1,30 +1,218 @@
 #!/usr/bin/env python3
 # Simple embedding server
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Response
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Tuple
 from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import uvicorn
+import asyncio
+import signal
+import socket
+import torch
 import os
 
+from bucketing import encode_bucketed
+from onnx_backend import EMBED_RUNTIME, load_encoder
+from vector_codec import MEDIA_TYPE, negotiate, pack_vectors
+
+# Concurrent /embed calls are coalesced into one encode for up to this long or this many texts
+BATCH_WINDOW_MS = float(os.getenv('EMBED_BATCH_WINDOW_MS', '5'))
+BATCH_MAX_TEXTS = int(os.getenv('EMBED_BATCH_MAX_TEXTS', '128'))
+# Server processes, each with its own event loop and encode thread; >1 forks after loading so weights are shared copy-on-write
+EMBED_WORKERS = int(os.getenv('EMBED_WORKERS', '1'))
+# Intra-op threads per process for torch; 0 splits the cores evenly between workers
+EMBED_THREADS = int(os.getenv('EMBED_THREADS', '0')) or max(1, (os.cpu_count() or 1) // EMBED_WORKERS)
+HOST = os.getenv('EMBED_HOST', '0.0.0.0')
+PORT = int(os.getenv('EMBED_PORT', '8081'))
+
 app = FastAPI()
 
 print('Loading BGE model...')
 cache_dir = os.getenv('MODEL_CACHE', '/cache')
-model = SentenceTransformer('BAAI/bge-small-en-v1.5', cache_folder=cache_dir)
+model_name = 'BAAI/bge-small-en-v1.5'
+model = SentenceTransformer(model_name, cache_folder=cache_dir)
 print('Model loaded successfully')
 
+# What encode() runs: the torch model, or an ONNX Runtime graph chosen by EMBED_RUNTIME (set up per worker)
+encoder = model
+
+# Encoding runs here so the event loop keeps answering /health and queueing requests meanwhile
+encode_executor: Optional[ThreadPoolExecutor] = None
+
 class EmbedRequest(BaseModel):
     texts: List[str]
 
+def encode(texts: List[str]) -> np.ndarray:
+    # Bucketed by token length so one long chunk does not pad a batch of short queries
+    return encode_bucketed(encoder, texts)
+
+class MicroBatcher:
+    """Merges concurrent requests into one encode and hands each caller its own rows.
+
+    A lone request waits at most window_ms for company; single-text queries
+    arriving together then share one forward pass instead of queueing for
+    one each. Requests larger than max_texts are encoded on their own, and
+    if a merged encode fails its requests are retried one by one so only
+    the caller whose input broke it sees the error.
+    """
+
+    def __init__(self, window_ms: float = BATCH_WINDOW_MS, max_texts: int = BATCH_MAX_TEXTS):
+        self.window = window_ms / 1000
+        self.max_texts = max_texts
+        self.queue: Optional[asyncio.Queue] = None
+        self.carry: Optional[Tuple[List[str], asyncio.Future]] = None  # request that did not fit the last batch
+        self.task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        first = self.carry or await self.queue.get()
+        self.carry = None
+        batch, count = [first], len(first[0])
+        deadline = loop.time() + self.window
+
+        while count < self.max_texts:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if count + len(item[0]) > self.max_texts:
+                self.carry = item
+                break
+            batch.append(item)
+            count += len(item[0])
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self.collect()
+            batch = [(texts, future) for texts, future in batch if not future.done()]  # callers that gave up
+            if not batch:
+                continue
+            merged = [text for texts, _ in batch for text in texts]
+            try:
+                vectors = await asyncio.get_running_loop().run_in_executor(encode_executor, encode, merged)
+            except Exception as e:
+                if len(batch) > 1:
+                    await self.encode_each(batch)
+                elif not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            offset = 0
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+    async def encode_each(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        """Encode the requests of a failed merged batch one at a time, so one bad request fails alone."""
+        loop = asyncio.get_running_loop()
+        for texts, future in batch:
+            if future.done():
+                continue
+            try:
+                vectors = await loop.run_in_executor(encode_executor, encode, texts)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += 1
+            if not future.done():
+                future.set_result(vectors)
+
+batcher = MicroBatcher()
+
+@app.on_event('startup')
+async def start_batcher():
+    global encode_executor, encoder
+    # Set per process: threads and pools do not survive the fork
+    torch.set_num_threads(EMBED_THREADS)
+    encoder = load_encoder(model, model_name, cache_dir, EMBED_RUNTIME, EMBED_THREADS)
+    encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encode')
+    batcher.start()
+
 @app.post('/embed')
-async def embed_texts(request: EmbedRequest):
-    embeddings = model.encode(request.texts, normalize_embeddings=True).tolist()
-    return {'embeddings': embeddings}
+async def embed_texts(request: EmbedRequest, accept: Optional[str] = Header(None)):
+    # Clients that accept it get raw little-endian vectors instead of JSON floats
+    dtype = negotiate(accept)
+    vectors = await batcher.embed(request.texts) if request.texts else np.empty((0, 0), dtype=np.float32)
+    if dtype:
+        return Response(content=pack_vectors(vectors, dtype), media_type=MEDIA_TYPE)
+    return {'embeddings': vectors.tolist()}
 
 @app.get('/health')
 async def health():
-    return {'status': 'healthy', 'model': 'bge-small-en-v1.5'}
+    return {'status': 'healthy', 'model': 'bge-small-en-v1.5', 'pid': os.getpid(), 'threads': EMBED_THREADS,
+            'runtime': 'torch' if encoder is model else EMBED_RUNTIME,
+            'requests_per_batch': round(batcher.requests / batcher.batches, 2) if batcher.batches else None}
+
+def serve_workers(workers: int):
+    """Fork workers that accept on one shared socket, after the model is loaded.
+
+    Nothing has run a forward pass yet, so no torch thread pool is forked,
+    and the weight pages stay shared until a worker writes to them (never,
+    for inference). The parent only supervises: if a worker dies the rest
+    are stopped and the container restart policy takes over.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            uvicorn.Server(uvicorn.Config(app, log_level='info')).run(sockets=[sock])
+            os._exit(0)
+        children.append(pid)
+    print(f'Serving on {HOST}:{PORT} with {workers} workers x {EMBED_THREADS} threads')
+
+    def stop(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    status = 0
+    while children:
+        try:
+            pid, code = os.wait()
+        except ChildProcessError:
+            break
+        children.remove(pid)
+        status = status or os.waitstatus_to_exitcode(code)
+        stop(None, None)
+    raise SystemExit(status)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host='0.0.0.0', port=8081)
\ No newline at end of file
+    if EMBED_WORKERS > 1:
+        serve_workers(EMBED_WORKERS)
+    else:
+        uvicorn.run(app, host=HOST, port=PORT)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# RECON Ingest - Document extractors
+# Stream plain text out of HTML and PDF documents, section by section
+
+import os
+import re
+import hashlib
+import pathlib
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+MAX_DOCUMENT_SIZE = int(os.getenv("MAX_DOCUMENT_SIZE", "50000000"))  # 50MB limit for extracted documents
+SECTION_CHARS = 8000  # HTML text is emitted in sections of about this size
+READ_BLOCK = 65536
+
+# (text, metadata) for one page or section of a document
+Section = Tuple[str, Dict]
+
+
+def file_digest(file_path: pathlib.Path) -> str:
+    """sha256 of the raw file bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(READ_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Incremental HTML-to-text parser that drops scripts, styles and page chrome."""
+
+    SKIP_TAGS = {
+        "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+        "nav", "header", "footer", "aside", "button", "select"
+    }
+    SKIP_ROLES = {"navigation", "banner", "contentinfo", "search", "complementary"}
+    SKIP_CLASSES = {
+        "nav", "navbar", "navigation", "menu", "sidebar", "footer", "header", "site-header",
+        "site-footer", "breadcrumb", "breadcrumbs", "cookie-banner", "toc", "skip-link"
+    }
+    CONTENT_TAGS = {"html", "body", "main", "article"}  # never dropped, whatever their classes
+    BLOCK_TAGS = {
+        "p", "div", "section", "article", "main", "li", "ul", "ol", "tr", "table",
+        "pre", "blockquote", "dd", "dt", "dl", "br", "hr", "td", "th", "figcaption"
+    }
+    HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+    # Inline elements whose neighbours are separate words (links in a row, labelled spans)
+    SPACED_TAGS = {"a", "span", "label", "img", "input", "time", "small", "abbr", "cite", "code", "kbd"}
+    NO_SPACE_BEFORE = ",.;:!?)]}'\""
+    NO_SPACE_AFTER = "([{'\"/"
+    VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "col", "embed"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.size = 0
+        self.title = ""
+        self.section_heading: Optional[str] = None  # first heading of the section being gathered
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        self.in_title = False
+        self.in_heading = False
+        self.pending_space = False  # an inline element boundary sits between the last text and the next
+        self.heading_parts: List[str] = []
+        self.sections: List[Section] = []  # completed sections waiting to be drained
+
+    def is_boilerplate(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> bool:
+        if tag in self.SKIP_TAGS:
+            return True
+        if tag in self.CONTENT_TAGS:
+            return False
+        attributes = dict(attrs)
+        if (attributes.get("role") or "").lower() in self.SKIP_ROLES:
+            return True
+        names = f"{attributes.get('class') or ''} {attributes.get('id') or ''}".lower().split()
+        return any(name in self.SKIP_CLASSES for name in names)
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag not in self.VOID_TAGS and self.is_boilerplate(tag, attrs):
+            self.skip_tag = tag
+            self.skip_depth = 1
+            return
+
+        if tag == "title":
+            self.in_title = True
+        elif tag in self.SPACED_TAGS:
+            self.pending_space = True
+        elif tag in self.HEADING_TAGS:
+            # Headings open a new section once the current one has some substance
+            if self.size >= SECTION_CHARS // 4:
+                self.finish_section()
+            self.in_heading = True
+            self.heading_parts = []
+            self.parts.append("\n\n")
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+            if self.size >= SECTION_CHARS:
+                self.finish_section()
+
+    def handle_endtag(self, tag):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+            return
+
+        if tag == "title":
+            self.in_title = False
+        elif tag in self.SPACED_TAGS:
+            self.pending_space = True
+        elif tag in self.HEADING_TAGS and self.in_heading:
+            self.in_heading = False
+            if self.section_heading is None:
+                self.section_heading = " ".join("".join(self.heading_parts).split())
+            self.parts.append("\n")
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self.skip_tag:
+            return
+        if self.in_title:
+            self.title += data
+            return
+
+        text = re.sub(r"[ \t\r\f\v]+", " ", data)
+        if not text:
+            return
+        previous = self.parts[-1][-1:] if self.parts else ""
+        if (self.pending_space and previous and not previous.isspace() and previous not in self.NO_SPACE_AFTER
+                and not text[0].isspace() and text[0] not in self.NO_SPACE_BEFORE):
+            text = " " + text
+        self.pending_space = False
+        if self.in_heading:
+            self.heading_parts.append(text)
+        self.parts.append(text)
+        self.size += len(text)
+
+    def finish_section(self):
+        """Move the text gathered so far into a completed section."""
+        text = re.sub(r"\n\s*\n\s*", "\n\n", "".join(self.parts))
+        text = re.sub(r" *\n *", "\n", text).strip()
+        if text:
+            self.sections.append((text, {
+                "section": len(self.sections) + 1,
+                "title": " ".join(self.title.split()),
+                "heading": self.section_heading or ""
+            }))
+        self.parts = []
+        self.size = 0
+        self.section_heading = None
+
+
+def extract_html(file_path: pathlib.Path) -> Iterator[Section]:
+    """Stream boilerplate-free text from an HTML file, one section at a time."""
+    parser = HTMLTextExtractor()
+    emitted = 0
+
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        while block := f.read(READ_BLOCK):
+            parser.feed(block)
+            while emitted < len(parser.sections):
+                yield parser.sections[emitted]
+                parser.sections[emitted] = None  # drop the text once handed downstream
+                emitted += 1
+
+    parser.close()
+    parser.finish_section()
+    while emitted < len(parser.sections):
+        yield parser.sections[emitted]
+        emitted += 1
+
+
+def extract_pdf(file_path: pathlib.Path) -> Iterator[Section]:
+    """Yield the text of a PDF one page at a time."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    for page_number, page in enumerate(reader.pages, start=1):
+        text = (page.extract_text() or "").strip()
+        if text:
+            yield text, {"page": page_number, "pages": total_pages}
+
+
+EXTRACTORS: Dict[str, Callable[[pathlib.Path], Iterator[Section]]] = {
+    ".html": extract_html,
+    ".htm": extract_html,
+    ".pdf": extract_pdf
+}
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# RECON Ingest - Git change detection
+# Work out what changed since the last indexed commit without walking and hashing the tree
+
+import os
+import pathlib
+import subprocess
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+GIT_TIMEOUT = int(os.getenv("GIT_TIMEOUT", "60"))  # seconds per git invocation
+
+
+class GitDelta(NamedTuple):
+    """Paths (relative to the ingested root) that differ from an indexed commit."""
+    changed: Set[str]  # added, modified or untracked
+    deleted: Set[str]
+    renamed: List[Tuple[str, str]]  # (old, new) pairs whose content is identical
+    dirty: Set[str]  # differ from HEAD right now (uncommitted or untracked)
+    ignored: Set[str] = frozenset()  # gitignored files, and wholly ignored directories with a trailing "/"
+    tracked: Set[str] = frozenset()  # every path git tracks; anything else git never reports changes for
+
+
+def git(repo_root: pathlib.Path, *args: str) -> Optional[str]:
+    """Run git in repo_root; None if git is missing or the command fails."""
+    try:
+        result = subprocess.run(
+            # The repository is usually a read-only mount owned by someone else
+            ["git", "-c", "safe.directory=*", "-C", str(repo_root), *args],
+            capture_output=True, text=True, timeout=GIT_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def head_commit(repo_root: pathlib.Path) -> Optional[str]:
+    """SHA of HEAD, or None when repo_root is not inside a git work tree."""
+    output = git(repo_root, "rev-parse", "--verify", "--quiet", "HEAD")
+    return output.strip() if output else None
+
+
+def untracked_paths(repo_root: pathlib.Path) -> Set[str]:
+    output = git(repo_root, "ls-files", "-z", "--others", "--exclude-standard")
+    return {path for path in (output or "").split("\0") if path}
+
+
+def ignored_paths(repo_root: pathlib.Path) -> Set[str]:
+    """Gitignored files that exist now; directories ignored as a whole come back as "dir/"."""
+    output = git(repo_root, "ls-files", "-z", "--others", "--ignored", "--exclude-standard", "--directory")
+    return {path for path in (output or "").split("\0") if path}
+
+
+def tracked_paths(repo_root: pathlib.Path) -> Set[str]:
+    output = git(repo_root, "ls-files", "-z")
+    return {path for path in (output or "").split("\0") if path}
+
+
+def dirty_paths(repo_root: pathlib.Path, untracked: Optional[Set[str]] = None) -> Set[str]:
+    """Paths whose working-tree content differs from HEAD."""
+    output = git(repo_root, "diff", "-z", "--name-only", "--relative", "HEAD")
+    if untracked is None:
+        untracked = untracked_paths(repo_root)
+    return {path for path in (output or "").split("\0") if path} | untracked
+
+
+def parse_name_status(output: str) -> GitDelta:
+    """Parse `git diff -z --name-status -M` output; partial renames count as delete + add."""
+    changed: Set[str] = set()
+    deleted: Set[str] = set()
+    renamed: List[Tuple[str, str]] = []
+
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in "RC":
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            i += 3
+            if status == "R100":
+                renamed.append((old_path, new_path))
+                continue
+            if status[0] == "R":
+                deleted.add(old_path)
+            changed.add(new_path)
+        else:
+            path = fields[i + 1]
+            i += 2
+            (deleted if status[0] == "D" else changed).add(path)
+
+    return GitDelta(changed, deleted, renamed, set())
+
+
+def changes_since(repo_root: pathlib.Path, commit: str) -> Optional[GitDelta]:
+    """Working-tree changes relative to commit, or None if that commit is no longer reachable.
+
+    Gitignored files never show up in a diff, so they are listed separately
+    along with the tracked paths; the caller rechecks those itself.
+    """
+    if git(repo_root, "cat-file", "-e", f"{commit}^{{commit}}") is None:
+        return None
+
+    output = git(repo_root, "diff", "-z", "--name-status", "-M", "--relative", commit)
+    if output is None:
+        return None
+
+    delta = parse_name_status(output)
+    untracked = untracked_paths(repo_root)
+    delta.changed.update(untracked)
+    return delta._replace(dirty=dirty_paths(repo_root, untracked), ignored=ignored_paths(repo_root),
+                          tracked=tracked_paths(repo_root))
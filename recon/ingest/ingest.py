@@ -6,23 +6,62 @@ import os
 import pathlib
 import hashlib
 import json
+import uuid
+import time
 import asyncio
-from typing import List, Dict, Optional, Tuple
+import argparse
+import multiprocessing
+import contextlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    AsyncContextManager, AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+)
 import httpx
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.models import PointStruct, PointIdsList
+
+from chunking import CHUNKER, SYNTAX_CHUNKING, TOKENIZER_NAME, Span, get_chunker
+from extractors import EXTRACTORS, MAX_DOCUMENT_SIZE, Section, file_digest
+from embed_cache import cache_key, open_cache
+from chunk_store import open_chunk_store
+from ingest_metrics import IngestMetrics
+from dedup import EmbeddingDeduper, text_hash
+from manifest import IngestManifest, content_hash, default_manifest_path, diff_chunk_ids
+from git_delta import GitDelta, changes_since, dirty_paths, head_commit
+from checkpoint import IngestCheckpoint, default_checkpoint_path, load_checkpoint
+from batch_sizing import AdaptiveBatchSizer
+from embed_pool import EmbedPool
+from vector_codec import accept_header, decode_embeddings
+from local_embedder import EMBED_MODEL_NAME, LocalEmbedder
+from collection_profiles import COLLECTION_PROFILE, PROFILES, create_collection, ensure_payload_indexes
 
 # Configuration
 RELEVANT_EXTENSIONS = {
     ".py", ".ts", ".tsx", ".js", ".java", ".go", ".rs", ".cs", 
     ".cpp", ".h", ".hpp", ".c", ".md", ".yaml", ".yml", 
     ".toml", ".json", ".txt", ".sh", ".ps1", ".dockerfile"
-}
+} | set(EXTRACTORS)  # HTML and PDF go through the document extractors
 
 CHUNK_TOKENS = int(os.getenv("CHUNK_SIZE", "400"))
 OVERLAP_TOKENS = int(os.getenv("OVERLAP", "60"))
-BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))  # starting texts per embed request; adapted at runtime
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))  # 0 = read/chunk inline on the event loop
+INGEST_EXECUTOR = os.getenv("INGEST_EXECUTOR", "process")  # "process" (CPU-bound) or "thread" (I/O-bound)
+QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", "4"))  # pipeline queue depth, in batches
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "2"))  # embedding batches in flight
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "2"))  # parallel Qdrant upserts
 MAX_FILE_SIZE = 2_000_000  # 2MB limit
+EMBED_MODEL = os.getenv("EMBED_MODEL", "bge-small-en-v1.5")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "http")  # "http" (embedder service) or "local" (in-process model)
+SERVICE_WAIT_TIMEOUT = float(os.getenv("SERVICE_WAIT_TIMEOUT", "300"))  # seconds to wait for Qdrant/embedder
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))  # retries of a failing chunk before giving up on its file
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", "2"))  # seconds, doubled on each pass
+GIT_DELTA = os.getenv("GIT_DELTA", "1") == "1"  # use `git diff` against the last indexed commit instead of a full walk
+WATCH_DEBOUNCE_MS = int(os.getenv("WATCH_DEBOUNCE_MS", "5000"))  # longest a burst of changes is held back
+WATCH_QUIET_MS = int(os.getenv("WATCH_QUIET_MS", "750"))  # quiet period that ends a burst
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "embed_cache.sqlite")  # "" disables the cache
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "")  # chunk text kept here instead of in payloads; "" = payloads
 
 IGNORE_DIRECTORIES = {
     "node_modules", "dist", ".git", "__pycache__", ".venv", 
@@ -30,105 +69,347 @@ IGNORE_DIRECTORIES = {
     ".pytest_cache", ".mypy_cache", "*.egg-info"
 }
 
+def new_batch_sizer() -> AdaptiveBatchSizer:
+    """Embed request sizer starting from BATCH_SIZE chunks (~4 chars per token)."""
+    return AdaptiveBatchSizer(BATCH_SIZE, BATCH_SIZE * CHUNK_TOKENS * 4)
+
+def embedder_overloaded(error: Exception) -> bool:
+    """Whether a failed /embed request points at load rather than at its texts."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError))
+
+# Pipeline end-of-stream marker
+_END = None
+
+# File-level work lives at module scope so it can be shipped to a process pool.
+
+def read_file_safe(file_path: pathlib.Path) -> Optional[str]:
+    """Safely read file content with size and encoding checks."""
+    try:
+        if file_path.stat().st_size > MAX_FILE_SIZE:
+            print(f"⚠️  Skipping large file: {file_path} ({file_path.stat().st_size} bytes)")
+            return None
+            
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+            
+        # Skip empty or very short files
+        if len(content.strip()) < 10:
+            return None
+            
+        return content
+        
+    except Exception as e:
+        print(f"❌ Error reading {file_path}: {e}")
+        return None
+
+def chunk_spans(text: str, chunk_size: int = CHUNK_TOKENS, overlap: int = OVERLAP_TOKENS,
+                extension: str = "") -> List[Span]:
+    """Character spans of chunks sized in embedder tokens; code is cut at definition boundaries."""
+    return get_chunker(chunk_size, overlap).spans(text, extension)
+
+def chunk_text(text: str, chunk_size: int = CHUNK_TOKENS, overlap: int = OVERLAP_TOKENS,
+               extension: str = "") -> List[str]:
+    """Split text into chunks, preserving the original formatting."""
+    return [text[start:end] for start, end in chunk_spans(text, chunk_size, overlap, extension)]
+
+def chunking_signature() -> str:
+    """Identifies the chunker that actually loaded; a change has every file re-chunked."""
+    chunker = get_chunker(CHUNK_TOKENS, OVERLAP_TOKENS)
+    unit = f"tokens:{TOKENIZER_NAME}" if chunker.unit == "tokens" else chunker.unit
+    return f"{unit}:{chunker.chunk_size}:{chunker.overlap}:syntax={int(SYNTAX_CHUNKING)}"
+
+def selection_signature() -> str:
+    """Identifies which files are eligible; a change means files outside a git delta may need indexing."""
+    settings = [sorted(RELEVANT_EXTENSIONS), sorted(IGNORE_DIRECTORIES), MAX_FILE_SIZE, MAX_DOCUMENT_SIZE]
+    return hashlib.sha256(json.dumps(settings).encode()).hexdigest()[:16]
+
+def chunk_point_id(relative_path: str, chunk_idx: int, chunk: str) -> str:
+    """Deterministic id for a chunk (Qdrant only accepts UUIDs or integers)."""
+    return str(uuid.UUID(hex=hashlib.sha256(
+        f"{relative_path}:{chunk_idx}:{chunk[:100]}".encode()
+    ).hexdigest()[:32]))
+
+def build_points(file_path: pathlib.Path, repo_root: pathlib.Path, content: str) -> List[Tuple[str, str, Dict]]:
+    """Chunk file content and attach ids and metadata."""
+    return build_section_points(file_path, repo_root, [(content, {})], len(content))
+
+def build_section_points(file_path: pathlib.Path, repo_root: pathlib.Path, sections: Iterable[Section],
+                         file_size: int) -> List[Tuple[str, str, Dict]]:
+    """Chunk each (text, metadata) section separately; chunks never span pages or sections.
+    
+    Sections are consumed one at a time, but the points of the whole file are
+    returned together: every point carries total_chunks, the manifest records
+    the file's chunk ids as a unit, and the list crosses the worker pool as
+    one result. A document's chunk text is therefore held in memory at once,
+    which MAX_DOCUMENT_SIZE bounds.
+    """
+    relative_path = file_path.relative_to(repo_root)
+    extension = file_path.suffix.lower()
+    
+    points = []
+    for section_text, section_meta in sections:
+        for start, end in chunk_spans(section_text, extension=extension):
+            chunk_idx = len(points)
+            chunk = section_text[start:end]
+            
+            chunk_id = chunk_point_id(str(relative_path), chunk_idx, chunk)
+            
+            # Create metadata
+            metadata = {
+                "path": str(relative_path),
+                "chunk": chunk_idx,
+                "extension": extension,
+                "file_size": file_size,
+                "chunk_size": len(chunk),
+                "start": start,  # character offsets into the source file (or page/section)
+                "end": end,
+                **section_meta,
+                "text_hash": text_hash(chunk),  # content address shared by identical chunks
+                "text": chunk  # Include text in payload for retrieval
+            }
+            
+            points.append((chunk_id, chunk, metadata))
+    
+    for _, _, metadata in points:
+        metadata["total_chunks"] = len(points)
+    
+    return points
+
+def prepare_document(file_path: pathlib.Path, repo_root: pathlib.Path,
+                     known_hash: Optional[str]) -> Tuple[Optional[str], Optional[List[Tuple[str, str, Dict]]]]:
+    """Hash and extract an HTML/PDF document, chunking it section by section into one list of points."""
+    try:
+        file_size = file_path.stat().st_size
+        if file_size > MAX_DOCUMENT_SIZE:
+            print(f"⚠️  Skipping large document: {file_path} ({file_size} bytes)")
+            return None, None
+        
+        file_hash = file_digest(file_path)
+        if file_hash == known_hash:
+            return file_hash, None
+        
+        points = build_section_points(file_path, repo_root, EXTRACTORS[file_path.suffix.lower()](file_path), file_size)
+        return (file_hash, points) if points else (None, None)
+        
+    except Exception as e:
+        print(f"❌ Error extracting {file_path}: {e}")
+        return None, None
+
+def prepare_file(file_path: pathlib.Path, repo_root: pathlib.Path,
+                 known_hash: Optional[str] = None) -> Tuple[Optional[str], Optional[List[Tuple[str, str, Dict]]]]:
+    """Read, hash and chunk one file.
+    
+    Returns (content_hash, points). The hash is None for unreadable or empty
+    files; points is None when the hash matches known_hash (file unchanged).
+    """
+    if file_path.suffix.lower() in EXTRACTORS:
+        return prepare_document(file_path, repo_root, known_hash)
+    
+    content = read_file_safe(file_path)
+    if not content:
+        return None, None
+    
+    file_hash = content_hash(content)
+    if file_hash == known_hash:
+        return file_hash, None
+    
+    return file_hash, build_points(file_path, repo_root, content)
+
+def plan_file(file_path: pathlib.Path, repo_root: pathlib.Path,
+              known_hash: Optional[str] = None) -> Tuple[str, int, List[Tuple[str, bytes]]]:
+    """prepare_file for --plan: (status, size, [(chunk_id, embed cache key)]).
+    
+    status is "large", "empty", "unchanged" or "changed"; only changed
+    files list their chunks, keyed for an embed cache lookup.
+    """
+    size = file_path.stat().st_size
+    if size > (MAX_DOCUMENT_SIZE if file_path.suffix.lower() in EXTRACTORS else MAX_FILE_SIZE):
+        return "large", size, []
+    
+    file_hash, points = prepare_file(file_path, repo_root, known_hash)
+    if file_hash is None:
+        return "empty", size, []
+    if points is None:
+        return "unchanged", size, []
+    return "changed", size, [(chunk_id, cache_key(EMBED_MODEL, chunk)) for chunk_id, chunk, _ in points]
+
 class RepositoryIngestor:
-    def __init__(self, qdrant_url: str, embed_url: str, collection: str):
+    def __init__(self, qdrant_url: str, embed_url: str, collection: str,
+                 incremental: bool = True, manifest_path: Optional[pathlib.Path] = None,
+                 workers: int = INGEST_WORKERS, executor_kind: str = INGEST_EXECUTOR,
+                 embed_cache_path: str = EMBED_CACHE_PATH, resume: bool = False,
+                 embed_backend: str = EMBED_BACKEND, profile: str = COLLECTION_PROFILE,
+                 chunk_store_path: str = CHUNK_STORE_PATH, pool: Optional[EmbedPool] = None):
         self.qdrant_client = QdrantClient(url=qdrant_url)
         self.embed_url = embed_url
         self.collection = collection
+        self.profile = profile
+        self.incremental = incremental
+        self.manifest_path = manifest_path or default_manifest_path(collection)
+        self.checkpoint_path = default_checkpoint_path(self.manifest_path)
+        self.resume = resume
+        self.full_run = not incremental
+        self.workers = workers
+        self.executor_kind = executor_kind
+        self.pool = pool
+        if pool:  # shared with the other jobs of a multi-repository run
+            self.embed_cache = pool.embed_cache
+            self.chunk_store = pool.chunk_store
+            self.local_embedder = pool.local_embedder
+            self.batch_sizer = pool.batch_sizer
+        else:
+            self.embed_cache = open_cache(EMBED_MODEL, embed_cache_path)
+            self.chunk_store = open_chunk_store(chunk_store_path, writable=True)
+            self.local_embedder = LocalEmbedder() if embed_backend == "local" else None
+            self.batch_sizer = new_batch_sizer()
+        self.metrics = IngestMetrics(collection)
+        self.state_files = self.own_files()
+        self.manifest: Optional[IngestManifest] = None
+        self.executor: Optional[Executor] = None
         self.session = None
         
     async def __aenter__(self):
-        self.session = httpx.AsyncClient(timeout=120)
+        self.session = self.pool.session if self.pool else httpx.AsyncClient(timeout=120)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.executor:
+            self.executor.shutdown()
+        if self.pool:  # the pool closes what it shares
+            return
         if self.session:
             await self.session.aclose()
+        if self.embed_cache:
+            self.embed_cache.close()
+        if self.chunk_store:
+            self.chunk_store.close()
+    
+    def own_files(self) -> Set[str]:
+        """Absolute paths the ingestor writes itself.
+        
+        They are never indexed or watched, even when MANIFEST_DIR or a cache
+        path points inside the repository: every manifest save would
+        otherwise trigger another watch-mode run.
+        """
+        paths = [self.manifest_path, self.checkpoint_path]
+        if self.embed_cache:
+            paths.extend(f"{self.embed_cache.path}{suffix}" for suffix in ("", "-wal", "-shm", "-journal"))
+        if self.chunk_store:
+            paths.extend((self.chunk_store.data_path, self.chunk_store.index_path))
+        for path in (self.metrics.report_path, self.metrics.textfile):
+            if path:
+                paths.append(path)
+        paths.extend(f"{path}.tmp" for path in list(paths))
+        return {os.path.abspath(path) for path in paths}
     
     def read_file_safe(self, file_path: pathlib.Path) -> Optional[str]:
         """Safely read file content with size and encoding checks."""
-        try:
-            if file_path.stat().st_size > MAX_FILE_SIZE:
-                print(f"⚠️  Skipping large file: {file_path} ({file_path.stat().st_size} bytes)")
-                return None
-                
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-                
-            # Skip empty or very short files
-            if len(content.strip()) < 10:
-                return None
-                
-            return content
-            
-        except Exception as e:
-            print(f"❌ Error reading {file_path}: {e}")
-            return None
+        return read_file_safe(file_path)
+    
+    def chunk_text(self, text: str, chunk_size: int = CHUNK_TOKENS, overlap: int = OVERLAP_TOKENS,
+                   extension: str = "") -> List[str]:
+        """Split text into chunks, preserving the original formatting."""
+        return chunk_text(text, chunk_size, overlap, extension)
     
-    def chunk_text(self, text: str, chunk_size: int = CHUNK_TOKENS, overlap: int = OVERLAP_TOKENS) -> List[str]:
-        """Split text into overlapping chunks based on word count."""
-        words = text.split()
+    async def wait_for_services(self, timeout: float = SERVICE_WAIT_TIMEOUT):
+        """Poll Qdrant and the embedder until both answer, instead of sleeping blindly."""
+        health_url = None if self.local_embedder else f"{self.embed_url.rsplit('/embed', 1)[0]}/health"
+        deadline = asyncio.get_running_loop().time() + timeout
         
-        if len(words) <= chunk_size:
-            return [text]
+        while True:
+            try:
+                await asyncio.to_thread(self.qdrant_client.get_collections)
+                if health_url:
+                    response = await self.session.get(health_url, timeout=5)
+                    response.raise_for_status()
+                print("✅ Qdrant and embedder are ready")
+                return
+            except Exception as e:
+                if asyncio.get_running_loop().time() >= deadline:
+                    raise RuntimeError(f"Services not ready after {timeout:.0f}s: {e}")
+                await asyncio.sleep(2)
+    
+    async def get_embeddings(self, texts: List[str]) -> Sequence[Sequence[float]]:
+        """Get embeddings, consulting the on-disk cache before the embedding service."""
+        if not self.embed_cache:
+            return await self.fetch_embeddings(texts)
         
-        chunks = []
-        start = 0
+        embeddings = self.embed_cache.get_many(texts)
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            fetched = await self.fetch_embeddings([texts[i] for i in misses])
+            self.embed_cache.put_many([texts[i] for i in misses], fetched)
+            for i, embedding in zip(misses, fetched):
+                embeddings[i] = embedding
         
-        while start < len(words):
-            end = min(start + chunk_size, len(words))
-            chunk = " ".join(words[start:end])
-            chunks.append(chunk)
-            
-            # Move start position with overlap
-            start = max(start + chunk_size - overlap, start + 1)
-            
-            if end == len(words):
-                break
-                
-        return chunks
+        return embeddings
+    
+    async def fetch_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings from the embedding service, in requests sized by the batch sizer."""
+        if self.local_embedder:
+            async with self.embed_slot():
+                started = time.monotonic()
+                vectors = await asyncio.to_thread(self.local_embedder.encode, texts)
+            self.metrics.embedded(len(texts), sum(len(text) for text in texts), time.monotonic() - started)
+            return vectors
+        
+        groups = [await self.post_embeddings(group) for group in self.batch_sizer.split(texts)]
+        return groups[0] if len(groups) == 1 else np.concatenate(groups)
     
-    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings from the embedding service."""
+    def embed_slot(self) -> AsyncContextManager:
+        """This job's turn at the shared embedder, or no limit when running alone."""
+        return self.pool.slot(self.collection) if self.pool else contextlib.nullcontext()
+    
+    async def post_embeddings(self, texts: List[str]) -> np.ndarray:
+        """One /embed request; its latency or failure feeds the batch sizer."""
+        chars = sum(len(text) for text in texts)
         try:
-            response = await self.session.post(
-                self.embed_url,
-                json={"texts": texts},
-                timeout=60
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result["embeddings"]
+            async with self.embed_slot():
+                started = time.monotonic()
+                response = await self.session.post(
+                    self.embed_url,
+                    json={"texts": texts},
+                    headers={"Accept": accept_header()},
+                    timeout=self.batch_sizer.timeout(chars)
+                )
+                response.raise_for_status()
+                vectors = decode_embeddings(response)
             
         except Exception as e:
-            print(f"❌ Embedding error: {e}")
+            self.batch_sizer.failure(len(texts), started, embedder_overloaded(e))
+            self.metrics.embedded(len(texts), chars, time.monotonic() - started, ok=False)
+            print(f"❌ Embedding error ({len(texts)} texts, {chars} chars): {e!r}")
             raise
+        
+        self.batch_sizer.success(len(texts), chars, time.monotonic() - started, started)
+        self.metrics.embedded(len(texts), chars, time.monotonic() - started)
+        return vectors
+    
+    async def embedding_dimension(self) -> int:
+        """Vector size produced by the configured embedder."""
+        if self.local_embedder:
+            return self.local_embedder.dimension
+        return len((await self.fetch_embeddings(["dimension probe"]))[0])
     
-    def ensure_collection_exists(self):
-        """Create collection if it doesn't exist."""
+    async def ensure_collection_exists(self):
+        """Create collection if it doesn't exist, laid out by the configured profile."""
         try:
             collections = [c.name for c in self.qdrant_client.get_collections().collections]
             
             if self.collection not in collections:
-                print(f"📦 Creating collection: {self.collection}")
-                self.qdrant_client.create_collection(
-                    collection_name=self.collection,
-                    vectors_config=VectorParams(
-                        size=384,  # BGE small embedding dimension
-                        distance=Distance.COSINE
-                    )
-                )
+                create_collection(self.qdrant_client, self.collection, await self.embedding_dimension(), self.profile)
             else:
                 print(f"✅ Collection exists: {self.collection}")
+                ensure_payload_indexes(self.qdrant_client, self.collection)
                 
         except Exception as e:
             print(f"❌ Collection setup error: {e}")
             raise
     
-    def discover_files(self, repo_path: pathlib.Path) -> List[pathlib.Path]:
-        """Discover all relevant files in the repository."""
-        files = []
-        
+    def iter_files(self, repo_path: pathlib.Path) -> Iterator[pathlib.Path]:
+        """Lazily yield relevant files in the repository."""
         for root, dirs, filenames in os.walk(repo_path):
             # Filter out ignored directories
             dirs[:] = [d for d in dirs if d not in IGNORE_DIRECTORIES]
@@ -136,45 +417,53 @@ class RepositoryIngestor:
             for filename in filenames:
                 file_path = pathlib.Path(root) / filename
                 
-                if file_path.suffix.lower() in RELEVANT_EXTENSIONS:
-                    files.append(file_path)
+                if (file_path.suffix.lower() in RELEVANT_EXTENSIONS
+                        and os.path.abspath(file_path) not in self.state_files):
+                    yield file_path
+    
+    def discover_files(self, repo_path: pathlib.Path) -> List[pathlib.Path]:
+        """Discover all relevant files in the repository."""
+        files = list(self.iter_files(repo_path))
         
         print(f"🔍 Discovered {len(files)} relevant files")
         return files
     
-    async def process_file(self, file_path: pathlib.Path, repo_root: pathlib.Path) -> List[Tuple[str, str, Dict]]:
+    async def process_file(self, file_path: pathlib.Path, repo_root: pathlib.Path,
+                           content: Optional[str] = None) -> List[Tuple[str, str, Dict]]:
         """Process a single file into chunks with metadata."""
-        content = self.read_file_safe(file_path)
+        if content is None:
+            content = self.read_file_safe(file_path)
         if not content:
             return []
         
-        relative_path = file_path.relative_to(repo_root)
-        chunks = self.chunk_text(content)
-        
-        points = []
-        for chunk_idx, chunk_text in enumerate(chunks):
-            # Generate unique ID for this chunk
-            chunk_id = hashlib.sha256(
-                f"{relative_path}:{chunk_idx}:{chunk_text[:100]}".encode()
-            ).hexdigest()
-            
-            # Create metadata
-            metadata = {
-                "path": str(relative_path),
-                "chunk": chunk_idx,
-                "total_chunks": len(chunks),
-                "extension": file_path.suffix.lower(),
-                "file_size": len(content),
-                "chunk_size": len(chunk_text),
-                "text": chunk_text  # Include text in payload for retrieval
-            }
-            
-            points.append((chunk_id, chunk_text, metadata))
-        
-        return points
+        return build_points(file_path, repo_root, content)
+    
+    def load_manifest(self) -> IngestManifest:
+        """Manifest for this collection, loaded once and kept across watch-mode runs."""
+        if self.manifest is None:
+            self.manifest = IngestManifest.load(self.manifest_path, self.collection, EMBED_MODEL,
+                                                chunking_signature(), selection_signature())
+            if not self.incremental:
+                # Re-embed everything, but keep the old chunk ids so the ones not rewritten are deleted
+                self.manifest.invalidate()
+        return self.manifest
+    
+    def is_relevant(self, file_path: pathlib.Path, repo_root: pathlib.Path) -> bool:
+        """Whether a path would be picked up by discover_files."""
+        try:
+            parts = file_path.relative_to(repo_root).parts
+        except ValueError:
+            return False
+        return (file_path.suffix.lower() in RELEVANT_EXTENSIONS and not IGNORE_DIRECTORIES.intersection(parts[:-1])
+                and os.path.abspath(file_path) not in self.state_files)
     
     async def ingest_repository(self, repo_path: str):
-        """Main ingestion process for a repository."""
+        """Main ingestion process for a repository.
+        
+        Runs as a streaming pipeline (discover -> read/chunk -> embed -> upsert)
+        joined by bounded queues, so memory stays flat regardless of repo size
+        and embedding starts as soon as the first batch of chunks is ready.
+        """
         print(f"🚀 Starting ingestion of: {repo_path}")
         
         repo_root = pathlib.Path(repo_path)
@@ -182,85 +471,737 @@ class RepositoryIngestor:
             raise ValueError(f"Repository path does not exist: {repo_path}")
         
         # Setup
-        self.ensure_collection_exists()
+        manifest = self.load_manifest()
+        manifest.claim(repo_root)
+        await self.ensure_collection_exists()
+        if self.resume:
+            self.resume_checkpoint(repo_root, manifest)
         
-        # Discover files
-        files = self.discover_files(repo_root)
+        head = head_commit(repo_root) if GIT_DELTA else None
+        delta = changes_since(repo_root, manifest.commit) if head and manifest.commit and manifest.files else None
         
-        if not files:
-            print("⚠️  No relevant files found")
-            return
+        if delta is None:
+            print(f"📝 Streaming files from {repo_root}...")
+            files, scope = self.iter_files(repo_root), None
+            pending = dirty_paths(repo_root) if head else set()
+        else:
+            print(f"🌿 Changes since {manifest.commit[:12]}: {len(delta.changed)} changed, "
+                  f"{len(delta.deleted)} deleted, {len(delta.renamed)} renamed")
+            files, scope = self.delta_files(repo_root, manifest, delta)
+            pending = delta.dirty
+        
+        # Uncommitted edits are rechecked next time even if HEAD has not moved
+        manifest.commit = head
+        manifest.pending = pending
+        await self.run_ingest(repo_root, files, scope)
+    
+    async def plan_repository(self, repo_path: str) -> Dict:
+        """Dry run: report what ingesting repo_path would read, chunk and embed.
         
-        # Process files in batches
-        all_points = []
+        Files are hashed and chunked exactly as a real run would, but nothing
+        is sent to the embedder or written to Qdrant. The projected embed
+        time uses the throughput recorded by the last sizeable run.
+        """
+        repo_root = pathlib.Path(repo_path)
+        if not repo_root.exists():
+            raise ValueError(f"Repository path does not exist: {repo_path}")
         
-        print(f"📝 Processing {len(files)} files...")
-        for i, file_path in enumerate(files):
+        print(f"🧭 Planning ingestion of: {repo_root}")
+        manifest = self.load_manifest()
+        manifest.claim(repo_root)
+        executor = self.get_executor()
+        loop = asyncio.get_running_loop()
+        
+        files = {"new": 0, "changed": 0, "unchanged": 0, "empty": 0, "large": 0, "failed": 0}
+        chunks = {"indexed": 0, "new": 0, "rewritten": 0, "stale": 0}
+        extensions: Dict[str, Dict[str, int]] = {}
+        directories: Dict[str, int] = {}  # chunks to write per top-level directory
+        large_files: List[Tuple[str, int]] = []
+        embed_keys: Set[bytes] = set()
+        seen_paths: Set[str] = set()
+        
+        async def plan_one(file_path: pathlib.Path):
+            relative_path = str(file_path.relative_to(repo_root))
+            known_hash = manifest.file_hash(relative_path)
             try:
-                points = await self.process_file(file_path, repo_root)
-                all_points.extend(points)
-                
-                if (i + 1) % 10 == 0:
-                    print(f"   Processed {i + 1}/{len(files)} files...")
-                    
+                if executor:
+                    status, size, planned = await loop.run_in_executor(
+                        executor, plan_file, file_path, repo_root, known_hash
+                    )
+                else:
+                    status, size, planned = plan_file(file_path, repo_root, known_hash)
             except Exception as e:
-                print(f"❌ Error processing {file_path}: {e}")
-                continue
+                print(f"❌ Error planning {file_path}: {e}")
+                files["failed"] += 1
+                return
+            
+            stats = extensions.setdefault(file_path.suffix.lower(), {"files": 0, "bytes": 0, "chunks": 0})
+            stats["files"] += 1
+            stats["bytes"] += size
+            old_ids = manifest.chunk_ids(relative_path)
+            
+            if status == "large":
+                large_files.append((relative_path, size))
+            if status in ("large", "empty"):
+                files[status] += 1
+                return  # a real run drops any chunks such files had as stale
+            
+            seen_paths.add(relative_path)
+            if status == "unchanged":
+                files["unchanged"] += 1
+                chunks["indexed"] += len(old_ids)
+                stats["chunks"] += len(old_ids)
+                return
+            
+            files["changed" if relative_path in manifest.files else "new"] += 1
+            new_ids = [chunk_id for chunk_id, _ in planned]
+            rewritten = len(set(old_ids).intersection(new_ids))
+            chunks["rewritten"] += rewritten
+            chunks["new"] += len(new_ids) - rewritten
+            chunks["stale"] += len(diff_chunk_ids(old_ids, new_ids))
+            stats["chunks"] += len(new_ids)
+            embed_keys.update(key for _, key in planned)
+            parts = pathlib.PurePath(relative_path).parts
+            top = parts[0] if len(parts) > 1 else "."
+            directories[top] = directories.get(top, 0) + len(new_ids)
+        
+        started = time.time()
+        window = max(1, self.workers) * 4  # keep every pool slot busy without queueing the whole tree
+        pending: List[pathlib.Path] = []
+        for file_path in self.iter_files(repo_root):
+            pending.append(file_path)
+            if len(pending) >= window:
+                await asyncio.gather(*(plan_one(path) for path in pending))
+                pending = []
+        await asyncio.gather(*(plan_one(path) for path in pending))
+        
+        for removed_path in set(manifest.paths()) - seen_paths:
+            chunks["stale"] += len(manifest.chunk_ids(removed_path))
+        
+        cached = self.embed_cache.cached_keys(list(embed_keys)) if self.embed_cache else set()
+        to_embed = len(embed_keys) - len(cached)
+        embed_seconds = to_embed / manifest.embed_rate if manifest.embed_rate else None
         
-        if not all_points:
-            print("⚠️  No chunks generated")
+        plan = {
+            "repository": str(repo_root),
+            "collection": self.collection,
+            "files": files,
+            "extensions": extensions,
+            "large_files": sorted(large_files, key=lambda item: -item[1]),
+            "chunks": chunks,
+            "directories": directories,
+            "embed": {"texts": to_embed, "cached": len(cached), "texts_per_s": manifest.embed_rate,
+                      "seconds": embed_seconds},
+            "planned_in_s": round(time.time() - started, 3)
+        }
+        print_plan(plan)
+        return plan
+    
+    def resume_checkpoint(self, repo_root: pathlib.Path, manifest: IngestManifest):
+        """Fold an interrupted run's finished files into the manifest so they are skipped."""
+        state = load_checkpoint(self.checkpoint_path)
+        if state is None:
+            print("ℹ️  No checkpoint to resume from, starting a normal run")
+            self.resume = False
+            return
+        if not state.matches(self.collection, repo_root):
+            print(f"⚠️  Checkpoint {self.checkpoint_path} belongs to another repository/collection, ignoring it")
+            self.resume = False
             return
         
-        print(f"📊 Generated {len(all_points)} chunks total")
+        if state.full:
+            manifest.invalidate()
+            self.full_run = True
+        for relative_path, entry in state.completed.items():
+            manifest.update(relative_path, entry["hash"], entry["chunk_ids"])
+        manifest.pending.update(state.retry)
+        
+        # Old chunks of finished files were never cleaned up before the interruption
+        self.delete_points(state.stale_ids())
+        print(f"⏯️  Resuming: {len(state.completed)} files already done, {len(state.retry)} queued for retry")
+    
+    def delta_files(self, repo_root: pathlib.Path, manifest: IngestManifest,
+                    delta: GitDelta) -> Tuple[List[pathlib.Path], Set[str]]:
+        """Apply pure renames in place and return the files to re-ingest plus the paths they cover.
+        
+        Gitignored files are indexed by a full walk but invisible to git
+        diffs, so they are rehashed on every run, and indexed paths git does
+        not track are rechecked in case they were deleted.
+        """
+        scope = delta.changed | delta.deleted | manifest.pending
+        for path in delta.ignored:
+            if not path.endswith("/"):
+                scope.add(path)
+            elif pathlib.PurePath(path).name not in IGNORE_DIRECTORIES:
+                scope.update(str(file_path.relative_to(repo_root)) for file_path in self.iter_files(repo_root / path))
+        scope.update(path for path in manifest.paths() if path not in delta.tracked)
         
-        # Process embeddings and upload in batches
-        await self.upload_chunks_batched(all_points)
+        for old_path, new_path in delta.renamed:
+            if old_path in manifest.pending or not self.move_file(manifest, old_path, new_path):
+                scope.update((old_path, new_path))
         
-        print(f"✅ Ingestion complete! Indexed {len(all_points)} chunks")
+        scope = {path for path in scope if self.is_relevant(repo_root / path, repo_root)}
+        files = [repo_root / path for path in sorted(scope) if (repo_root / path).is_file()]
+        return files, scope
     
-    async def upload_chunks_batched(self, all_points: List[Tuple[str, str, Dict]]):
-        """Upload chunks to Qdrant in batches with embeddings."""
-        for i in range(0, len(all_points), BATCH_SIZE):
-            batch = all_points[i:i + BATCH_SIZE]
+    def move_file(self, manifest: IngestManifest, old_path: str, new_path: str) -> bool:
+        """Re-key a renamed file's points under its new path, reusing the stored vectors."""
+        chunk_ids = manifest.chunk_ids(old_path)
+        if (not chunk_ids or new_path in manifest.files
+                or pathlib.PurePath(old_path).suffix.lower() != pathlib.PurePath(new_path).suffix.lower()):
+            return False
+        
+        try:
+            records = self.qdrant_client.retrieve(
+                collection_name=self.collection, ids=chunk_ids, with_payload=True, with_vectors=True
+            )
+            if len(records) != len(chunk_ids):
+                return False
             
-            # Extract texts for embedding
-            texts = [chunk_text for _, chunk_text, _ in batch]
+            points = []
+            for record in records:
+                payload = {**record.payload, "path": new_path}
+                text = payload.get("text")
+                if text is None:
+                    text = self.chunk_store.get_many([payload["text_hash"]])[0]
+                points.append(PointStruct(
+                    id=chunk_point_id(new_path, payload["chunk"], text),
+                    vector=record.vector,
+                    payload=payload
+                ))
             
+            self.qdrant_client.upsert(collection_name=self.collection, points=points)
+            self.delete_points(chunk_ids)
+        except Exception as e:
+            print(f"⚠️  Could not move {old_path} -> {new_path}, re-ingesting: {e}")
+            return False
+        
+        manifest.update(new_path, manifest.file_hash(old_path), [point.id for point in points])
+        manifest.remove(old_path)
+        print(f"🔀 Moved {len(points)} chunks: {old_path} -> {new_path}")
+        return True
+    
+    async def ingest_paths(self, repo_root: pathlib.Path, paths: Iterable[pathlib.Path]):
+        """Re-ingest just the given paths; ones that no longer exist are dropped from the index."""
+        paths = sorted({path for path in paths if self.is_relevant(path, repo_root)})
+        if not paths:
+            return
+        
+        print(f"🔄 {len(paths)} changed files under {repo_root}")
+        scope = {str(path.relative_to(repo_root)) for path in paths}
+        # The recorded commit no longer describes these files
+        self.load_manifest().pending.update(scope)
+        await self.run_ingest(repo_root, [path for path in paths if path.is_file()], scope)
+    
+    async def watch_repository(self, repo_path: str):
+        """Index the repository, then keep re-ingesting files as they change on disk.
+        
+        Filesystem events (inotify on Linux) are batched until the tree has been
+        quiet for WATCH_QUIET_MS, or at most WATCH_DEBOUNCE_MS, so a branch
+        checkout turns into one update instead of thousands.
+        """
+        try:
+            from watchfiles import awatch
+        except ImportError:
+            raise RuntimeError("Watch mode requires the watchfiles package (pip install watchfiles)")
+        
+        repo_root = pathlib.Path(repo_path).resolve()
+        await self.ingest_repository(str(repo_root))
+        
+        print(f"👀 Watching {repo_root} for changes...")
+        async for changes in awatch(
+            repo_root,
+            debounce=WATCH_DEBOUNCE_MS,
+            step=WATCH_QUIET_MS,
+            watch_filter=lambda change, path: self.is_relevant(pathlib.Path(path), repo_root)
+        ):
             try:
-                # Get embeddings for this batch
-                embeddings = await self.get_embeddings(texts)
+                await self.ingest_paths(repo_root, (pathlib.Path(path) for _, path in changes))
+            except Exception as e:
+                print(f"❌ Update failed, will retry on the next change: {e}")
+    
+    async def run_ingest(self, repo_root: pathlib.Path, files: Iterable[pathlib.Path],
+                         scope: Optional[Set[str]] = None):
+        """Push files through the pipeline and reconcile the manifest.
+        
+        scope lists the relative paths this run is authoritative for; manifest
+        entries in scope that were not seen are deleted. None means the whole
+        repository was walked.
+        """
+        manifest = self.load_manifest()
+        run = IngestRun(manifest)
+        self.metrics.start_run()
+        run.checkpoint = IngestCheckpoint(self.checkpoint_path, self.collection, repo_root,
+                                          full=self.full_run, append=self.resume)
+        file_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE * BATCH_SIZE)
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE * BATCH_SIZE)
+        executor = self.get_executor()
+        self.metrics.watch("files", file_queue)
+        self.metrics.watch("chunks", chunk_queue)
+        sampler = asyncio.create_task(self.metrics.sample_queues())
+        
+        try:
+            failed_ids = (await run_pipeline(
+                self.discover_stage(files, file_queue, consumers=max(1, self.workers)),
+                self.chunk_stage(repo_root, file_queue, chunk_queue, run, executor),
+                self.upload_chunks_batched(chunk_queue, run.checkpoint)
+            ))[-1]
+        except BaseException:
+            run.checkpoint.close()
+            print(f"💾 Progress saved to {self.checkpoint_path}; rerun with --resume to continue")
+            self.metrics.finish_run(self.stage_concurrency(), status="interrupted")
+            raise
+        finally:
+            sampler.cancel()
+        
+        if run.files_seen == 0 and scope is None:
+            print("⚠️  No relevant files found")
+        
+        print(f"📊 Processed {run.files_seen} files, generated {run.chunks} chunks")
+        
+        # Files that vanished (or became empty/oversized) since the last run
+        known_paths = set(manifest.paths()) if scope is None else scope.intersection(manifest.paths())
+        for removed_path in known_paths - run.seen_paths:
+            run.stale_ids.extend(manifest.remove(removed_path))
+        
+        if run.unchanged:
+            print(f"⏭️  Skipped {run.unchanged} unchanged files")
+        if not run.chunks:
+            print("⚠️  No new or changed chunks")
+        
+        # Only record files whose chunks all landed, so failures are retried next run
+        for relative_path, (file_hash, chunk_ids) in run.file_updates.items():
+            if failed_ids.intersection(chunk_ids):
+                # Keep the ids tracked (some of them landed) but have the file re-processed
+                manifest.update(relative_path, None, chunk_ids)
+                manifest.pending.add(relative_path)
+            else:
+                manifest.update(relative_path, file_hash, chunk_ids)
+        
+        self.delete_points(run.stale_ids)
+        if manifest.untracked and scope is None:
+            self.prune_untracked(manifest)
+        manifest.embed_rate = self.metrics.embed_rate() or manifest.embed_rate
+        manifest.save()
+        run.checkpoint.close(remove=True)
+        self.resume = False
+        self.full_run = False
+        
+        print(f"✅ Ingestion complete! Indexed {run.chunks - len(failed_ids)} chunks")
+        self.metrics.finish_run(self.stage_concurrency(), status="partial" if failed_ids else "ok")
+    
+    def prune_untracked(self, manifest: IngestManifest):
+        """Delete points no manifest entry owns; their baseline was lost with the old manifest."""
+        tracked = {chunk_id for path in manifest.paths() for chunk_id in manifest.chunk_ids(path)}
+        untracked = []
+        offset = None
+        while True:
+            records, offset = self.qdrant_client.scroll(
+                collection_name=self.collection, limit=BATCH_SIZE * 32, offset=offset,
+                with_payload=False, with_vectors=False
+            )
+            untracked.extend(record.id for record in records if str(record.id) not in tracked)
+            if offset is None:
+                break
+        
+        self.delete_points(untracked)
+        manifest.untracked = False
+    
+    def stage_concurrency(self) -> Dict[str, int]:
+        """Parallel slots per stage, to turn busy time into utilization."""
+        return {"prepare": max(1, self.workers), "embed": EMBED_CONCURRENCY, "upsert": UPSERT_CONCURRENCY}
+    
+    def get_executor(self) -> Optional[Executor]:
+        """Pool used for file reading/chunking (kept across runs), or None when running inline."""
+        if self.workers <= 0:
+            return None
+        if self.executor is None:
+            if self.executor_kind == "thread":
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            else:
+                # Forking a process that already holds a torch model can deadlock its thread pools
+                context = multiprocessing.get_context("forkserver") if self.local_embedder else None
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self.executor
+    
+    async def discover_stage(self, files: Iterable[pathlib.Path], file_queue: asyncio.Queue, consumers: int = 1):
+        """Pipeline stage: feed file paths (typically a lazy tree walk) downstream.
+        
+        End markers only follow a complete walk: after a failure or cancel the
+        consumers may be gone, and a put into a full queue would never return.
+        run_pipeline cancels the other stages instead.
+        """
+        for file_path in files:
+            await file_queue.put(file_path)
+        for _ in range(consumers):
+            await file_queue.put(_END)
+    
+    async def chunk_stage(self, repo_root: pathlib.Path, file_queue: asyncio.Queue,
+                          chunk_queue: asyncio.Queue, run: "IngestRun",
+                          executor: Optional[Executor] = None):
+        """Pipeline stage: read, hash and chunk files, skipping unchanged ones.
+        
+        With an executor, one consumer per worker keeps every pool slot busy
+        while the event loop stays free for embedding and upserts.
+        """
+        consumers = max(1, self.workers) if executor else 1
+        await asyncio.gather(*(
+            self.chunk_worker(repo_root, file_queue, chunk_queue, run, executor)
+            for _ in range(consumers)
+        ))
+        await chunk_queue.put(_END)  # normal completion only, as in discover_stage
+    
+    async def chunk_worker(self, repo_root: pathlib.Path, file_queue: asyncio.Queue,
+                           chunk_queue: asyncio.Queue, run: "IngestRun",
+                           executor: Optional[Executor]):
+        loop = asyncio.get_running_loop()
+        
+        while (file_path := await file_queue.get()) is not _END:
+            run.files_seen += 1
+            started = time.monotonic()
+            file_size = 0
+            try:
+                relative_path = str(file_path.relative_to(repo_root))
+                known_hash = run.manifest.file_hash(relative_path)
+                file_size = file_path.stat().st_size
                 
-                # Create Qdrant points
-                qdrant_points = [
-                    PointStruct(
-                        id=chunk_id,
-                        vector=embedding,
-                        payload=metadata
+                if executor:
+                    file_hash, points = await loop.run_in_executor(
+                        executor, prepare_file, file_path, repo_root, known_hash
                     )
-                    for (chunk_id, _, metadata), embedding in zip(batch, embeddings)
-                ]
+                else:
+                    file_hash, points = prepare_file(file_path, repo_root, known_hash)
                 
-                # Upload to Qdrant
-                self.qdrant_client.upsert(
-                    collection_name=self.collection,
-                    points=qdrant_points
-                )
+                if file_hash is None:
+                    self.metrics.file("skipped", file_size, time.monotonic() - started)
+                    continue
                 
-                print(f"   Uploaded batch {i//BATCH_SIZE + 1}/{(len(all_points) + BATCH_SIZE - 1)//BATCH_SIZE}")
+                run.seen_paths.add(relative_path)
+                if points is None:
+                    run.unchanged += 1
+                    self.metrics.file("unchanged", file_size, time.monotonic() - started)
+                    continue
+                
+                self.metrics.file("processed", file_size, time.monotonic() - started)
+                self.metrics.chunked(len(points))
+                chunk_ids = [chunk_id for chunk_id, _, _ in points]
+                stale_ids = diff_chunk_ids(run.manifest.chunk_ids(relative_path), chunk_ids)
+                run.stale_ids.extend(stale_ids)
+                run.file_updates[relative_path] = (file_hash, chunk_ids)
+                if run.checkpoint:
+                    run.checkpoint.expect(relative_path, file_hash, chunk_ids, stale_ids)
+                run.chunks += len(points)
+                
+                for point in points:
+                    await chunk_queue.put(point)
                 
             except Exception as e:
-                print(f"❌ Batch upload error: {e}")
+                print(f"❌ Error processing {file_path}: {e}")
+                self.metrics.file("failed", file_size, time.monotonic() - started)
                 continue
+            
+            finally:
+                if run.files_seen % 10 == 0:
+                    print(f"   Processed {run.files_seen} files...")
+    
+    def delete_points(self, chunk_ids: List[str]):
+        """Remove stale points left behind by changed or deleted files."""
+        if not chunk_ids:
+            return
+        
+        for i in range(0, len(chunk_ids), BATCH_SIZE * 8):
+            self.qdrant_client.delete(
+                collection_name=self.collection,
+                points_selector=PointIdsList(points=chunk_ids[i:i + BATCH_SIZE * 8])
+            )
+        
+        print(f"🧹 Deleted {len(chunk_ids)} stale chunks")
+    
+    async def iter_batches(self, chunk_queue: asyncio.Queue,
+                           deduper: EmbeddingDeduper) -> AsyncIterator[Tuple[List[Tuple[str, str, Dict]], List[str],
+                                                                          List[asyncio.Future]]]:
+        """Group queued chunks into batches sized by the batch sizer's current limits.
+        
+        Yields (points, owned_hashes, vectors): owned hashes are the unique
+        texts this batch embeds; its other points reuse vectors from earlier
+        batches. vectors holds one future per point.
+        """
+        batch = []
+        owned = []
+        vectors = []
+        owned_chars = 0
+        while (point := await chunk_queue.get()) is not _END:
+            batch.append(point)
+            chunk_hash = point[2]["text_hash"]
+            must_embed, vector = deduper.claim(chunk_hash)
+            vectors.append(vector)
+            if must_embed:
+                owned.append(chunk_hash)
+                owned_chars += len(point[1])
+            
+            # Flush on enough fresh texts, or if a long run of duplicates piles up
+            if (len(owned) >= self.batch_sizer.texts_limit or owned_chars >= self.batch_sizer.chars_limit
+                    or len(batch) >= BATCH_SIZE * 8):
+                yield batch, owned, vectors
+                batch = []
+                owned = []
+                vectors = []
+                owned_chars = 0
+        
+        if batch:
+            yield batch, owned, vectors
+    
+    def point_payload(self, metadata: Dict) -> Dict:
+        """Payload stored in Qdrant; the chunk text is left out when the chunk store holds it."""
+        if not self.chunk_store:
+            return metadata
+        return {key: value for key, value in metadata.items() if key != "text"}
+    
+    def upsert_batch(self, batch: List[Tuple[str, str, Dict]], embeddings: Sequence[Sequence[float]]):
+        """Blocking Qdrant upsert of one embedded batch; run off the event loop."""
+        if self.chunk_store:
+            # Text goes to the chunk store before any point that references it becomes searchable
+            self.chunk_store.put_many((metadata["text_hash"], chunk_text) for _, chunk_text, metadata in batch)
+        
+        qdrant_points = [
+            PointStruct(
+                id=chunk_id,
+                vector=embedding.tolist() if isinstance(embedding, np.ndarray) else embedding,
+                payload=self.point_payload(metadata)
+            )
+            for (chunk_id, _, metadata), embedding in zip(batch, embeddings)
+        ]
+        
+        started = time.monotonic()
+        try:
+            self.qdrant_client.upsert(
+                collection_name=self.collection,
+                points=qdrant_points
+            )
+        except Exception:
+            self.metrics.upserted(len(qdrant_points), time.monotonic() - started, ok=False)
+            raise
+        self.metrics.upserted(len(qdrant_points), time.monotonic() - started)
+    
+    async def upload_chunks_batched(self, chunk_queue: asyncio.Queue,
+                                    checkpoint: Optional[IngestCheckpoint] = None) -> Set[str]:
+        """Embed and upload chunks from the queue in batches; returns ids of chunks that failed.
+        
+        Up to EMBED_CONCURRENCY embedding requests are in flight at once while
+        UPSERT_CONCURRENCY workers push finished batches to Qdrant from worker
+        threads, so the embedder and Qdrant are kept busy at the same time.
+        Failed batches are set aside and retried once the stream is drained.
+        """
+        retry_queue: List[Tuple[List[Tuple[str, str, Dict]], Optional[List[List[float]]]]] = []
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        embed_slots = asyncio.Semaphore(EMBED_CONCURRENCY)
+        embed_tasks: Set[asyncio.Task] = set()
+        deduper = EmbeddingDeduper()
+        self.metrics.watch("upserts", upsert_queue)
+        
+        async def embed_batch(batch_num: int, batch: List[Tuple[str, str, Dict]], owned: List[str],
+                              vectors: List[asyncio.Future]):
+            try:
+                try:
+                    if owned:
+                        texts = {metadata["text_hash"]: chunk_text for _, chunk_text, metadata in batch}
+                        embedded = await self.get_embeddings([texts[chunk_hash] for chunk_hash in owned])
+                        for chunk_hash, vector in zip(owned, embedded):
+                            deduper.resolve(chunk_hash, vector)
+                except Exception as e:
+                    deduper.fail(owned, e)
+                    raise
+                
+                # Fan vectors out to every point, including copies embedded by other batches
+                embeddings = [(await vector).tolist() for vector in vectors]
+                await upsert_queue.put((batch_num, batch, embeddings))
+            except Exception as e:
+                print(f"❌ Embedding batch {batch_num} error, queued for retry: {e}")
+                retry_queue.append((batch, None))
+            finally:
+                embed_slots.release()
+        
+        async def upsert_worker():
+            while (item := await upsert_queue.get()) is not _END:
+                batch_num, batch, embeddings = item
+                try:
+                    await asyncio.to_thread(self.upsert_batch, batch, embeddings)
+                    print(f"   Uploaded batch {batch_num}")
+                    if checkpoint:
+                        checkpoint.uploaded(metadata["path"] for _, _, metadata in batch)
+                except Exception as e:
+                    print(f"❌ Batch {batch_num} upload error, queued for retry: {e}")
+                    retry_queue.append((batch, embeddings))
+        
+        upsert_workers = [asyncio.create_task(upsert_worker()) for _ in range(UPSERT_CONCURRENCY)]
+        try:
+            batch_num = 0
+            async for batch, owned, vectors in self.iter_batches(chunk_queue, deduper):
+                batch_num += 1
+                await embed_slots.acquire()
+                task = asyncio.create_task(embed_batch(batch_num, batch, owned, vectors))
+                embed_tasks.add(task)
+                task.add_done_callback(embed_tasks.discard)
+            
+            await asyncio.gather(*embed_tasks)
+            for _ in upsert_workers:
+                await upsert_queue.put(_END)
+            await asyncio.gather(*upsert_workers)
+            
+        except BaseException:
+            for task in [*embed_tasks, *upsert_workers]:
+                task.cancel()
+            raise
+        
+        retry_queue = await self.retry_batches(retry_queue, checkpoint)
+        failed_ids = {chunk_id for batch, _ in retry_queue for chunk_id, _, _ in batch}
+        if checkpoint and retry_queue:
+            checkpoint.failed(metadata["path"] for batch, _ in retry_queue for _, _, metadata in batch)
+        
+        if self.embed_cache:
+            stats = self.embed_cache.stats()
+            print(f"💾 Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)")
+        if self.chunk_store:
+            stats = self.chunk_store.stats()
+            print(f"🗄️  Chunk store: {stats['chunks']} texts, {stats['bytes'] / 1e6:.1f} MB compressed")
+        if self.batch_sizer.requests:
+            print(f"📐 Embed requests settled at {self.batch_sizer.texts_limit} texts / "
+                  f"{self.batch_sizer.chars_limit} chars ({self.batch_sizer.failures} failed)")
+        if deduper.duplicates:
+            print(f"♻️  Reused embeddings for {deduper.duplicates} duplicate chunks "
+                  f"({deduper.unique} unique texts)")
+        return failed_ids
+    
+    async def retry_batches(self, retry_queue: List[Tuple[List[Tuple[str, str, Dict]], Optional[List[List[float]]]]],
+                            checkpoint: Optional[IngestCheckpoint] = None):
+        """Re-send failed batches with exponential backoff; returns the ones that still fail.
+        
+        A batch that fails again is split in half for the next pass, down to
+        single chunks, so one text the embedder or Qdrant rejects only holds
+        back its own file. Only single chunks use up retry attempts.
+        """
+        if RETRY_ATTEMPTS <= 0:
+            return retry_queue
+        queue = [(batch, embeddings, 0) for batch, embeddings in retry_queue]  # (..., failed single attempts)
+        failed = []
+        while queue:
+            delay = RETRY_BACKOFF * 2 ** min(attempts for _, _, attempts in queue)
+            print(f"🔁 Retrying {len(queue)} failed batches ({sum(len(batch) for batch, _, _ in queue)} chunks) "
+                  f"in {delay:.0f}s...")
+            await asyncio.sleep(delay)
+            self.metrics.retried(len(queue))
+            
+            still_failing = []
+            for batch, embeddings, attempts in queue:
+                try:
+                    if embeddings is None:
+                        texts = {metadata["text_hash"]: chunk_text for _, chunk_text, metadata in batch}
+                        vectors = dict(zip(texts, await self.get_embeddings(list(texts.values()))))
+                        embeddings = [vectors[metadata["text_hash"]] for _, _, metadata in batch]
+                    await asyncio.to_thread(self.upsert_batch, batch, embeddings)
+                    if checkpoint:
+                        checkpoint.uploaded(metadata["path"] for _, _, metadata in batch)
+                except Exception as e:
+                    if len(batch) > 1:
+                        half = len(batch) // 2
+                        print(f"❌ Retry of {len(batch)} chunks failed, splitting: {e}")
+                        for part in (slice(None, half), slice(half, None)):
+                            still_failing.append((batch[part], None if embeddings is None else embeddings[part],
+                                                  attempts))
+                    elif attempts + 1 < RETRY_ATTEMPTS:
+                        print(f"❌ Retry of {batch[0][2]['path']} chunk {batch[0][2]['chunk']} failed: {e}")
+                        still_failing.append((batch, embeddings, attempts + 1))
+                    else:
+                        failed.append((batch, embeddings))
+            queue = still_failing
+        
+        if failed:
+            print(f"❌ {len(failed)} chunks still failing; their files will be retried next run")
+        return failed
+
+
+class IngestRun:
+    """Mutable bookkeeping shared by the stages of one ingestion run."""
+    
+    def __init__(self, manifest: IngestManifest):
+        self.manifest = manifest
+        self.files_seen = 0
+        self.unchanged = 0
+        self.chunks = 0
+        self.seen_paths: Set[str] = set()
+        self.stale_ids: List[str] = []
+        self.file_updates: Dict[str, Tuple[str, List[str]]] = {}
+        self.checkpoint: Optional[IngestCheckpoint] = None
+
+
+async def run_pipeline(*stages: Awaitable) -> List:
+    """Run pipeline stages concurrently; if one fails, cancel the rest so none block on a queue."""
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def print_plan(plan: Dict, top: int = 10):
+    """Human-readable summary of plan_repository()'s result."""
+    files, chunks, embed = plan["files"], plan["chunks"], plan["embed"]
+    
+    print(f"📋 Plan for {plan['repository']} -> {plan['collection']} (walked in {plan['planned_in_s']:.1f}s)")
+    print(f"   Files: {sum(files.values())} relevant; {files['new']} new, {files['changed']} changed, "
+          f"{files['unchanged']} unchanged, {files['empty']} empty, {files['large']} too large"
+          + (f", {files['failed']} unreadable" if files["failed"] else ""))
+    
+    print("   By extension:")
+    for extension, stats in sorted(plan["extensions"].items(), key=lambda item: -item[1]["chunks"])[:top]:
+        print(f"      {extension or '(none)':<12} {stats['files']:>7} files {stats['bytes'] / 1e6:>9.1f} MB "
+              f"{stats['chunks']:>9} chunks")
+    
+    if plan["large_files"]:
+        print(f"⚠️  Skipping {len(plan['large_files'])} large files:")
+        for path, size in plan["large_files"][:top]:
+            print(f"      {path} ({size / 1e6:.1f} MB)")
+    
+    print(f"   Chunks: {chunks['indexed']} already indexed, {chunks['new']} new, "
+          f"{chunks['rewritten']} rewritten, {chunks['stale']} stale to delete")
+    if plan["directories"]:
+        heaviest = sorted(plan["directories"].items(), key=lambda item: -item[1])[:top]
+        print("   Most chunks to write: " + ", ".join(f"{name}/ {count}" for name, count in heaviest))
+    
+    if embed["seconds"] is not None:
+        eta = f"{embed['seconds']:.0f}s" if embed["seconds"] < 120 else f"{embed['seconds'] / 60:.0f} min"
+        print(f"   Embedding: {embed['texts']} texts ({embed['cached']} cached), "
+              f"~{eta} at {embed['texts_per_s']:.1f} texts/s from the last run")
+    else:
+        print(f"   Embedding: {embed['texts']} texts ({embed['cached']} cached); "
+              f"no recorded throughput yet, run once to calibrate the estimate")
 
 async def main():
     """Main entry point."""
-    import sys
-    
-    if len(sys.argv) != 2:
-        print("Usage: python ingest.py <repository_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="RECON repository ingestion")
+    parser.add_argument("repo_path", help="Repository root to index")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-embed every file, ignoring recorded hashes")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Read/chunk worker count (0 = inline on the event loop)")
+    parser.add_argument("--executor", choices=["process", "thread"], default=INGEST_EXECUTOR,
+                        help="Worker pool type for reading and chunking")
+    parser.add_argument("--embed-backend", choices=["http", "local"], default=EMBED_BACKEND,
+                        help="Embed via the embedder service or with the model loaded in-process")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=COLLECTION_PROFILE,
+                        help="Quantization/storage/HNSW preset used when creating the collection")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and re-ingest files as they change")
+    parser.add_argument("--plan", action="store_true",
+                        help="Report files, chunks and projected embed time without embedding or writing")
+    args = parser.parse_args()
     
-    repo_path = sys.argv[1]
+    repo_path = args.repo_path
     
     # Environment configuration
     qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
@@ -270,20 +1211,40 @@ async def main():
     print(f"🎯 RECON Ingestion Configuration:")
     print(f"   Repository: {repo_path}")
     print(f"   Qdrant: {qdrant_url}")
-    print(f"   Embeddings: {embed_url}")
-    print(f"   Collection: {collection}")
+    print(f"   Embeddings: {embed_url if args.embed_backend == 'http' else f'in-process {EMBED_MODEL_NAME}'}")
+    print(f"   Collection: {collection} ({args.profile} profile)")
     print(f"   Chunk size: {CHUNK_TOKENS} tokens")
     print(f"   Overlap: {OVERLAP_TOKENS} tokens")
-    print(f"   Batch size: {BATCH_SIZE}")
+    print(f"   Chunker: {CHUNKER}" + (f" ({TOKENIZER_NAME})" if CHUNKER == "tokens" else ""))
+    print(f"   Batch size: {BATCH_SIZE} (adaptive)")
+    print(f"   Read/chunk workers: {args.workers or 'inline'}" + (f" ({args.executor})" if args.workers else ""))
+    print(f"   Queue depth: {QUEUE_SIZE} batches")
+    print(f"   In-flight embeds/upserts: {EMBED_CONCURRENCY}/{UPSERT_CONCURRENCY}")
+    print(f"   Mode: {'full' if args.full else 'incremental'}{' + watch' if args.watch else ''}"
+          f"{' (plan only)' if args.plan else ''}")
     print()
     
-    # Wait for services to be ready
-    print("⏳ Waiting for services...")
-    await asyncio.sleep(10)
+    if args.plan:
+        # Only the tree, manifest and embed cache are read: no model, services or chunk store needed
+        async with RepositoryIngestor(qdrant_url, embed_url, collection, incremental=not args.full,
+                                      workers=args.workers, executor_kind=args.executor,
+                                      embed_backend="http", chunk_store_path="") as ingestor:
+            await ingestor.plan_repository(repo_path)
+        return
     
     # Start ingestion
-    async with RepositoryIngestor(qdrant_url, embed_url, collection) as ingestor:
-        await ingestor.ingest_repository(repo_path)
+    async with RepositoryIngestor(qdrant_url, embed_url, collection, incremental=not args.full,
+                                  workers=args.workers, executor_kind=args.executor,
+                                  resume=args.resume, embed_backend=args.embed_backend,
+                                  profile=args.profile) as ingestor:
+        # Wait for services to be ready
+        print("⏳ Waiting for services...")
+        await ingestor.wait_for_services()
+        
+        if args.watch:
+            await ingestor.watch_repository(repo_path)
+        else:
+            await ingestor.ingest_repository(repo_path)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# RECON Ingest - Per-stage metrics
+# Counters, latency histograms and queue depths per pipeline stage, exported to Prometheus and a JSON run report
+
+import os
+import json
+import time
+import asyncio
+import pathlib
+from typing import Dict, List, Optional
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serve /metrics on this port; 0 = off
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # node_exporter textfile collector path; "" = off
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH", "")  # JSON report written after each run; "" = off
+MIN_RATE_TEXTS = 64  # embedded texts needed before a run's throughput is trusted
+SAMPLE_INTERVAL = float(os.getenv("METRICS_SAMPLE_INTERVAL", "1.0"))  # seconds between queue samples
+TEXTFILE_INTERVAL = 15.0  # seconds between textfile rewrites during a run
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class LatencyStats:
+    """Latency samples for one stage within a run."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    @property
+    def total(self) -> float:
+        return sum(self.samples)
+
+    def summary(self) -> Dict:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+
+        def pct(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+        return {
+            "count": len(ordered),
+            "total_s": round(sum(ordered), 3),
+            "mean_s": round(sum(ordered) / len(ordered), 4),
+            "p50_s": pct(0.5),
+            "p90_s": pct(0.9),
+            "p99_s": pct(0.99),
+            "max_s": round(ordered[-1], 4)
+        }
+
+
+class IngestMetrics:
+    """Per-run bookkeeping, mirrored into Prometheus when prometheus_client is installed."""
+
+    def __init__(self, collection: str, port: int = METRICS_PORT, textfile: str = METRICS_TEXTFILE,
+                 report_path: str = RUN_REPORT_PATH):
+        self.collection = collection
+        self.textfile = textfile
+        self.report_path = report_path
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.prom = None
+        self.last_report: Optional[Dict] = None
+        self.start_run()
+
+        if port or textfile:
+            try:
+                self.prom = prometheus_metrics(port)
+            except ImportError:
+                print("⚠️  prometheus_client not installed; metrics only go to the run report")
+
+    def start_run(self):
+        self.started = time.time()
+        self.last_textfile = self.started
+        self.files: Dict[str, int] = {"processed": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+        self.bytes_read = 0
+        self.chunks = 0
+        self.points_upserted = 0
+        self.embed_texts = 0
+        self.embed_chars = 0
+        self.embed_errors = 0
+        self.embed_window: List[float] = []  # [first request start, last response] on time.monotonic()
+        self.upsert_errors = 0
+        self.retries = 0
+        self.prepare = LatencyStats()
+        self.embed_latency = LatencyStats()
+        self.upsert_latency = LatencyStats()
+        self.queue_samples: Dict[str, List[int]] = {}
+
+    # Stage hooks
+
+    def file(self, status: str, size: int = 0, seconds: float = 0.0):
+        self.files[status] = self.files.get(status, 0) + 1
+        self.bytes_read += size
+        self.prepare.add(seconds)
+        if self.prom:
+            self.prom.files.labels(self.collection, status).inc()
+            self.prom.bytes_read.labels(self.collection).inc(size)
+            self.prom.prepare_latency.labels(self.collection).observe(seconds)
+
+    def chunked(self, count: int):
+        self.chunks += count
+        if self.prom:
+            self.prom.chunks.labels(self.collection).inc(count)
+
+    def embedded(self, texts: int, chars: int, seconds: float, ok: bool = True):
+        if ok:
+            self.embed_texts += texts
+            self.embed_chars += chars
+            self.embed_latency.add(seconds)
+            now = time.monotonic()
+            first = min(self.embed_window[0], now - seconds) if self.embed_window else now - seconds
+            self.embed_window = [first, now]
+        else:
+            self.embed_errors += 1
+        if self.prom:
+            self.prom.embed_requests.labels(self.collection, "ok" if ok else "error").inc()
+            if ok:
+                self.prom.embed_texts.labels(self.collection).inc(texts)
+                self.prom.embed_latency.labels(self.collection).observe(seconds)
+
+    def upserted(self, points: int, seconds: float, ok: bool = True):
+        if ok:
+            self.points_upserted += points
+            self.upsert_latency.add(seconds)
+        else:
+            self.upsert_errors += 1
+        if self.prom:
+            self.prom.upserts.labels(self.collection, "ok" if ok else "error").inc()
+            if ok:
+                self.prom.points.labels(self.collection).inc(points)
+                self.prom.upsert_latency.labels(self.collection).observe(seconds)
+
+    def retried(self, batches: int):
+        self.retries += batches
+        if self.prom:
+            self.prom.retries.labels(self.collection).inc(batches)
+
+    def embed_rate(self) -> Optional[float]:
+        """Texts embedded per wall-clock second while embedding was under way, if enough ran."""
+        if self.embed_texts < MIN_RATE_TEXTS or not self.embed_window:
+            return None
+        return self.embed_texts / max(self.embed_window[1] - self.embed_window[0], 1e-9)
+
+    # Queue depths
+
+    def watch(self, name: str, queue: asyncio.Queue):
+        self.queues[name] = queue
+
+    async def sample_queues(self):
+        """Sample watched queue depths until cancelled; full queues point at a slow downstream stage."""
+        while True:
+            for name, queue in list(self.queues.items()):
+                depth = queue.qsize()
+                self.queue_samples.setdefault(name, []).append(depth)
+                if self.prom:
+                    self.prom.queue_depth.labels(self.collection, name).set(depth)
+            if self.textfile and self.prom and time.time() - self.last_textfile >= TEXTFILE_INTERVAL:
+                self.write_textfile()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    # Reporting
+
+    def report(self, concurrency: Dict[str, int], status: str = "ok") -> Dict:
+        elapsed = max(time.time() - self.started, 1e-9)
+        files_total = sum(self.files.values())
+
+        # Share of each stage's capacity that was busy; the highest is the likely bottleneck
+        utilization = {
+            "prepare": self.prepare.total / (elapsed * max(concurrency.get("prepare", 1), 1)),
+            "embed": self.embed_latency.total / (elapsed * max(concurrency.get("embed", 1), 1)),
+            "upsert": self.upsert_latency.total / (elapsed * max(concurrency.get("upsert", 1), 1))
+        }
+
+        return {
+            "collection": self.collection,
+            "status": status,
+            "started_at": self.started,
+            "elapsed_s": round(elapsed, 3),
+            "files": {**self.files, "total": files_total, "per_s": round(files_total / elapsed, 2)},
+            "bytes_read": self.bytes_read,
+            "chunks": {"produced": self.chunks, "upserted": self.points_upserted,
+                       "per_s": round(self.points_upserted / elapsed, 2)},
+            "embed": {"texts": self.embed_texts, "chars": self.embed_chars, "errors": self.embed_errors,
+                      "texts_per_s": round(self.embed_rate() or 0.0, 2), "latency": self.embed_latency.summary()},
+            "upsert": {"errors": self.upsert_errors, "latency": self.upsert_latency.summary()},
+            "prepare": {"latency": self.prepare.summary()},
+            "retries": self.retries,
+            "queues": {
+                name: {"mean": round(sum(samples) / len(samples), 2), "max": max(samples),
+                       "capacity": self.queues[name].maxsize if name in self.queues else None}
+                for name, samples in self.queue_samples.items() if samples
+            },
+            "utilization": {stage: round(value, 3) for stage, value in utilization.items()},
+            "bottleneck": max(utilization, key=utilization.get)
+        }
+
+    def finish_run(self, concurrency: Dict[str, int], status: str = "ok") -> Dict:
+        """Print a summary and write the textfile and JSON report, if configured."""
+        report = self.last_report = self.report(concurrency, status)
+        self.queues = {}
+
+        print(f"📈 {report['files']['per_s']} files/s, {report['chunks']['per_s']} chunks/s, "
+              f"{report['bytes_read'] / 1e6:.1f} MB read; busiest stage: {report['bottleneck']} "
+              f"({report['utilization'][report['bottleneck']]:.0%} utilized)")
+
+        if self.prom:
+            self.prom.last_run.labels(self.collection).set(time.time())
+            if self.textfile:
+                self.write_textfile()
+        if self.report_path:
+            path = pathlib.Path(self.report_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            os.replace(tmp_path, path)
+            print(f"📝 Run report written to {path}")
+        return report
+
+    def write_textfile(self):
+        from prometheus_client import write_to_textfile
+
+        self.last_textfile = time.time()
+        write_to_textfile(self.textfile, self.prom.registry)  # atomic rename, as node_exporter expects
+
+
+class PrometheusMetrics:
+    """The Prometheus side of IngestMetrics, on its own registry."""
+
+    def __init__(self):
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+        self.registry = CollectorRegistry()
+        labels = ["collection"]
+        self.files = Counter("recon_ingest_files_total", "Files seen, by outcome",
+                             labels + ["status"], registry=self.registry)
+        self.bytes_read = Counter("recon_ingest_bytes_read_total", "Bytes of source files read",
+                                  labels, registry=self.registry)
+        self.chunks = Counter("recon_ingest_chunks_total", "Chunks produced by the chunker",
+                              labels, registry=self.registry)
+        self.points = Counter("recon_ingest_points_upserted_total", "Points written to Qdrant",
+                              labels, registry=self.registry)
+        self.embed_requests = Counter("recon_ingest_embed_requests_total", "Embedder requests, by outcome",
+                                      labels + ["status"], registry=self.registry)
+        self.embed_texts = Counter("recon_ingest_embed_texts_total", "Texts embedded",
+                                   labels, registry=self.registry)
+        self.upserts = Counter("recon_ingest_upserts_total", "Qdrant upsert requests, by outcome",
+                               labels + ["status"], registry=self.registry)
+        self.retries = Counter("recon_ingest_retries_total", "Batches re-sent after a failure",
+                               labels, registry=self.registry)
+        self.prepare_latency = Histogram("recon_ingest_prepare_seconds", "Read/hash/chunk time per file",
+                                         labels, buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.embed_latency = Histogram("recon_ingest_embed_seconds", "Embedder request latency",
+                                       labels, buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.upsert_latency = Histogram("recon_ingest_upsert_seconds", "Qdrant upsert latency",
+                                        labels, buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.queue_depth = Gauge("recon_ingest_queue_depth", "Items waiting between pipeline stages",
+                                 labels + ["queue"], registry=self.registry)
+        self.last_run = Gauge("recon_ingest_last_run_timestamp_seconds", "When the last run finished",
+                              labels, registry=self.registry)
+
+
+_prometheus: Optional[PrometheusMetrics] = None
+
+
+def prometheus_metrics(port: int = 0) -> PrometheusMetrics:
+    """Process-wide registry, so concurrent jobs share one /metrics endpoint labelled by collection."""
+    global _prometheus
+    if _prometheus is None:
+        _prometheus = PrometheusMetrics()
+        if port:
+            from prometheus_client import start_http_server
+            start_http_server(port, registry=_prometheus.registry)
+            print(f"📈 Metrics on :{port}/metrics")
+    return _prometheus
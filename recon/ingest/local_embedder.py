@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# RECON Ingest - In-process embedding backend
+# Runs the embedder's SentenceTransformer inside the ingestor for single-box bulk indexing
+
+import os
+import threading
+from typing import List
+
+import numpy as np
+
+from bucketing import EMBED_TOKEN_BUDGET, encode_bucketed
+from chunking import MODEL_CACHE
+from onnx_backend import EMBED_RUNTIME, load_encoder
+
+EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "BAAI/bge-small-en-v1.5")
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "64"))  # most texts per forward pass; EMBED_TOKEN_BUDGET also applies
+LOCAL_DEVICE = os.getenv("LOCAL_DEVICE") or None  # e.g. "cpu", "cuda"; None lets torch pick
+
+
+class LocalEmbedder:
+    """Same model and normalization as embedder.py, without the HTTP/JSON round trip."""
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, batch_size: int = LOCAL_BATCH_SIZE,
+                 device: str = LOCAL_DEVICE):
+        from sentence_transformers import SentenceTransformer
+
+        print(f"🧠 Loading {model_name} in-process...")
+        self.model = load_encoder(SentenceTransformer(model_name, cache_folder=MODEL_CACHE, device=device),
+                                  model_name, MODEL_CACHE, EMBED_RUNTIME)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+        self.lock = threading.Lock()  # one encode at a time; torch already uses every core
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into one float32 matrix, in input order, bucketed by token length like the server."""
+        with self.lock:
+            return encode_bucketed(self.model, texts, EMBED_TOKEN_BUDGET, self.batch_size)
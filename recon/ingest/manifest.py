@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# RECON Ingest - Incremental ingestion manifest
+# Tracks per-file content hashes so unchanged files are never re-embedded
+
+import os
+import json
+import hashlib
+import pathlib
+from typing import Dict, List, Optional, Set
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a file's decoded content."""
+    return hashlib.sha256(content.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class IngestManifest:
+    """Sidecar manifest mapping relative path -> content hash and chunk ids."""
+
+    def __init__(self, path: pathlib.Path, collection: str, embed_model: str, chunking: str = "",
+                 selection: str = ""):
+        self.path = pathlib.Path(path)
+        self.collection = collection
+        self.embed_model = embed_model
+        self.chunking = chunking
+        self.selection = selection  # which files are eligible; a change needs a full walk, not a git delta
+        self.files: Dict[str, Dict] = {}
+        self.repo: Optional[str] = None  # resolved root of the repository the entries are relative to
+        self.commit: Optional[str] = None  # git HEAD the index was last brought up to
+        self.pending: Set[str] = set()  # paths a git-delta run must recheck (uncommitted or failed)
+        self.embed_rate: Optional[float] = None  # texts/s the last sizeable run embedded at, for --plan
+        self.untracked = False  # the collection may hold points no entry owns (manifest lost or unreadable)
+
+    @classmethod
+    def load(cls, path: pathlib.Path, collection: str, embed_model: str,
+             chunking: str = "", selection: str = "") -> "IngestManifest":
+        """Load a manifest for this collection, model and chunker.
+
+        One built for another model or chunker keeps its chunk ids, so the
+        next run deletes whatever it does not rewrite, but every file is
+        re-embedded. One that cannot be read (or belongs to another
+        collection) leaves the collection's points untracked. Changed file
+        selection settings only force a full walk; hashes stay valid.
+        """
+        manifest = cls(path, collection, embed_model, chunking, selection)
+        if not manifest.path.exists():
+            return manifest
+
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable manifest {manifest.path}: {e}")
+            manifest.untracked = True
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION or data.get("collection") != collection:
+            print(f"⚠️  Manifest {manifest.path} was built for a different collection or format, starting fresh")
+            manifest.untracked = True
+            return manifest
+
+        manifest.files = data.get("files", {})
+        manifest.repo = data.get("repo")
+        manifest.commit = data.get("commit")
+        manifest.pending = set(data.get("pending", []))
+        manifest.embed_rate = data.get("embed_rate")
+
+        if data.get("embed_model") != embed_model or data.get("chunking", "") != chunking:
+            print(f"⚠️  Manifest {manifest.path} was built for a different model/chunker, re-embedding every file")
+            manifest.invalidate()
+        elif data.get("selection", "") != selection and manifest.commit:
+            print(f"⚠️  File selection settings changed since {manifest.path} was written, walking the whole tree")
+            manifest.commit = None
+        return manifest
+
+    def save(self):
+        """Atomically persist the manifest next to its previous version."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "collection": self.collection,
+                "embed_model": self.embed_model,
+                "chunking": self.chunking,
+                "selection": self.selection,
+                "repo": self.repo,
+                "commit": self.commit,
+                "pending": sorted(self.pending),
+                "embed_rate": self.embed_rate,
+                "files": self.files
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def claim(self, repo_root: pathlib.Path):
+        """Tie the manifest to repo_root; refuse one that describes another repository.
+
+        Its files would all look deleted, and their points would be dropped.
+        """
+        root = str(pathlib.Path(repo_root).resolve())
+        if self.repo and self.repo != root and self.files:
+            raise ValueError(f"{self.collection} is indexed from {self.repo}, not {root}; ingesting would delete "
+                             f"that repository's points. Use another collection, or delete {self.path} "
+                             f"if the repository moved")
+        self.repo = root
+
+    def invalidate(self):
+        """Make every file look changed while keeping its chunk ids as the baseline for stale deletes."""
+        for entry in self.files.values():
+            entry["hash"] = None
+        self.commit = None
+
+    def is_unchanged(self, relative_path: str, file_hash: str) -> bool:
+        entry = self.files.get(relative_path)
+        return entry is not None and entry["hash"] == file_hash
+
+    def file_hash(self, relative_path: str) -> Optional[str]:
+        entry = self.files.get(relative_path)
+        return entry["hash"] if entry else None
+
+    def chunk_ids(self, relative_path: str) -> List[str]:
+        entry = self.files.get(relative_path)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def update(self, relative_path: str, file_hash: Optional[str], chunk_ids: List[str]):
+        """Record a file's chunks; a None hash keeps them tracked but has the file re-processed."""
+        self.files[relative_path] = {"hash": file_hash, "chunk_ids": list(chunk_ids)}
+
+    def remove(self, relative_path: str) -> List[str]:
+        """Forget a file and return the chunk ids it owned."""
+        entry = self.files.pop(relative_path, None)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def paths(self) -> List[str]:
+        return list(self.files.keys())
+
+
+def default_manifest_path(collection: str) -> pathlib.Path:
+    """Manifest location; kept outside the (often read-only) repository mount."""
+    manifest_dir = pathlib.Path(os.getenv("MANIFEST_DIR", "."))
+    return manifest_dir / f"{collection}.manifest.json"
+
+
+def diff_chunk_ids(old_ids: List[str], new_ids: List[str]) -> List[str]:
+    """Chunk ids that existed before but are no longer produced."""
+    keep = set(new_ids)
+    return [chunk_id for chunk_id in old_ids if chunk_id not in keep]
+
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# RECON Embedding - ONNX Runtime backends
+# The SentenceTransformer's transformer exported to ONNX (optionally dynamic int8) behind the same encode() API
+
+import os
+import fcntl
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBED_RUNTIME = os.getenv("EMBED_RUNTIME", "torch")  # "torch", "onnx" (fp32) or "onnx-int8"
+EMBED_PARITY_MIN = float(os.getenv("EMBED_PARITY_MIN", "0.99"))  # lowest cosine to fp32 before falling back to torch
+RUNTIMES = ("torch", "onnx", "onnx-int8")
+ONNX_OPSET = 14
+
+PARITY_TEXTS = [
+    "how does the ingestor skip unchanged files",
+    "def chunk_point_id(relative_path, chunk_idx, chunk):\n    return str(uuid.UUID(hex=digest[:32]))",
+    "Qdrant stores int8 quantized vectors in RAM and rescores with the originals kept on disk.",
+    "async with self.embed_slot():\n    response = await self.session.post(self.embed_url, json={'texts': texts})",
+    "services:\n  embedder:\n    image: python:3.11-slim\n    environment:\n      - MODEL_CACHE=/cache",
+    "error",
+]
+
+
+class OnnxEncoder:
+    """Drop-in for SentenceTransformer.encode() running the exported graph on ONNX Runtime.
+
+    Tokenization and pooling mirror the wrapped SentenceTransformer, so
+    callers (and length bucketing) cannot tell the two apart.
+    """
+
+    def __init__(self, st_model, path: str, threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads  # 0 lets ONNX Runtime use every core
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.path = path
+
+        self.tokenizer = st_model.tokenizer
+        self.max_seq_length = st_model.max_seq_length
+        self.dimension = st_model.get_sentence_embedding_dimension()
+        self.cls_pooling = bool(getattr(st_model[1], "pooling_mode_cls_token", False))
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            hidden = self.session.run(None, {name: encoded[name].astype(np.int64) for name in self.input_names})[0]
+            if self.cls_pooling:
+                pooled = hidden[:, 0]
+            else:
+                mask = encoded["attention_mask"][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            vectors[start:start + len(pooled)] = pooled
+
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+def onnx_dir(model_name: str, cache_dir: Optional[str]) -> str:
+    return os.getenv("ONNX_DIR") or os.path.join(cache_dir or ".", "onnx", model_name.replace("/", "--"))
+
+
+def export_onnx(st_model, path: str):
+    """Trace the transformer (before pooling) to ONNX with dynamic batch and sequence axes."""
+    import torch
+
+    transformer = st_model[0].auto_model.eval()
+    sample = st_model.tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class HiddenStates(torch.nn.Module):
+        def forward(self, *inputs):
+            return transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(), tuple(sample[name] for name in input_names), path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes={name: axes for name in input_names + ["last_hidden_state"]},
+            opset_version=ONNX_OPSET
+        )
+
+
+def ensure_onnx(st_model, model_name: str, cache_dir: Optional[str], quantized: bool) -> str:
+    """Path of the exported (and optionally int8-quantized) graph, building it on first use.
+
+    A file lock keeps concurrent workers from exporting the same model twice;
+    files are written under a temporary name and renamed into place.
+    """
+    directory = onnx_dir(model_name, cache_dir)
+    os.makedirs(directory, exist_ok=True)
+    fp32_path = os.path.join(directory, "model.onnx")
+    int8_path = os.path.join(directory, "model.int8.onnx")
+    target = int8_path if quantized else fp32_path
+
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(fp32_path):
+            print(f"📦 Exporting {model_name} to ONNX...")
+            export_onnx(st_model, fp32_path + ".tmp")
+            os.replace(fp32_path + ".tmp", fp32_path)
+        if quantized and not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            print("📦 Quantizing weights to int8 (dynamic activations)...")
+            quantize_dynamic(fp32_path, int8_path + ".tmp", weight_type=QuantType.QInt8)
+            os.replace(int8_path + ".tmp", int8_path)
+    return target
+
+
+def parity(reference: np.ndarray, vectors: np.ndarray) -> Dict[str, float]:
+    """Cosine agreement of two sets of normalized embeddings of the same texts."""
+    cosines = np.sum(reference * vectors, axis=1)
+    return {"min_cosine": float(cosines.min()), "mean_cosine": float(cosines.mean())}
+
+
+def load_encoder(st_model, model_name: str, cache_dir: Optional[str] = None,
+                 runtime: str = EMBED_RUNTIME, threads: int = 0):
+    """The encoder for a runtime: st_model itself for torch, else an OnnxEncoder that passed the parity check.
+
+    Builds ONNX Runtime sessions and runs forward passes, so in a forking
+    server call it in each worker, after the fork.
+    """
+    if runtime == "torch":
+        return st_model
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown EMBED_RUNTIME {runtime!r} (choose from {', '.join(RUNTIMES)})")
+
+    encoder = OnnxEncoder(st_model, ensure_onnx(st_model, model_name, cache_dir, runtime == "onnx-int8"), threads)
+    check = parity(
+        st_model.encode(PARITY_TEXTS, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False),
+        encoder.encode(PARITY_TEXTS, normalize_embeddings=True)
+    )
+    if check["min_cosine"] < EMBED_PARITY_MIN:
+        print(f"⚠️  {runtime} drifts from fp32 (min cosine {check['min_cosine']:.4f} < {EMBED_PARITY_MIN}); "
+              f"staying on torch")
+        return st_model
+
+    print(f"✅ {runtime} backend ready (cosine to fp32: min {check['min_cosine']:.4f}, "
+          f"mean {check['mean_cosine']:.4f})")
+    return encoder
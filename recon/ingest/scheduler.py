@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# RECON Ingest - Multi-repository scheduler
+# Runs repo -> collection jobs from a job file concurrently against one shared embedder pool
+
+import os
+import glob
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+from typing import Dict, List, NamedTuple
+
+from ingest import (
+    CHUNK_STORE_PATH, EMBED_BACKEND, EMBED_CACHE_PATH, EMBED_MODEL, INGEST_EXECUTOR, INGEST_WORKERS,
+    RepositoryIngestor, new_batch_sizer
+)
+from embed_cache import open_cache
+from chunk_store import open_chunk_store
+from embed_pool import EMBED_INFLIGHT, EmbedPool
+from ingest_metrics import RUN_REPORT_PATH
+from local_embedder import LocalEmbedder
+from collection_profiles import COLLECTION_PROFILE, PROFILES
+
+MAX_JOBS = int(os.getenv("MAX_JOBS", "4"))  # repositories ingested at the same time
+
+
+class IngestJob(NamedTuple):
+    repo: str
+    collection: str
+    profile: str = COLLECTION_PROFILE
+    full: bool = False
+    workers: int = INGEST_WORKERS
+
+
+def load_jobs(path: str) -> List[IngestJob]:
+    """Read a job file of repo -> collection mappings.
+
+    {"jobs": [{"repo": "/repos/main", "collection": "main"},
+              {"repo": "/repos/mirrors/*", "collection": "mirror-{name}", "profile": "memory"}]}
+
+    A repo containing a glob expands to one job per matching directory,
+    with {name} in the collection replaced by the directory name. Explicit
+    entries win over glob matches of the same directory.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)["jobs"]
+
+    explicit = {os.path.realpath(entry["repo"]) for entry in entries if not glob.has_magic(entry["repo"])}
+    jobs: List[IngestJob] = []
+    for entry in entries:
+        options = {key: entry[key] for key in ("profile", "full", "workers") if key in entry}
+        if options.get("profile", COLLECTION_PROFILE) not in PROFILES:
+            raise ValueError(f"Unknown collection profile {options['profile']!r} in {path}")
+
+        if not glob.has_magic(entry["repo"]):
+            jobs.append(IngestJob(entry["repo"], entry["collection"].format(name=pathlib.Path(entry["repo"]).name),
+                                  **options))
+            continue
+        for repo in sorted(glob.glob(entry["repo"])):
+            if os.path.isdir(repo) and os.path.realpath(repo) not in explicit:
+                jobs.append(IngestJob(repo, entry["collection"].format(name=pathlib.Path(repo).name), **options))
+
+    # Manifests and checkpoints are per collection, so two jobs cannot share one
+    seen: Dict[str, str] = {}
+    for job in jobs:
+        if job.collection in seen:
+            raise ValueError(f"Collection {job.collection} is mapped from both {seen[job.collection]} and {job.repo}")
+        seen[job.collection] = job.repo
+    return jobs
+
+
+async def run_jobs(jobs: List[IngestJob], qdrant_url: str, embed_url: str, embed_backend: str = EMBED_BACKEND,
+                   executor_kind: str = INGEST_EXECUTOR, max_jobs: int = MAX_JOBS,
+                   inflight: int = EMBED_INFLIGHT, report_path: str = RUN_REPORT_PATH) -> bool:
+    """Ingest every job, at most max_jobs at a time; returns False if any job failed."""
+    pool = EmbedPool(
+        open_cache(EMBED_MODEL, EMBED_CACHE_PATH),
+        open_chunk_store(CHUNK_STORE_PATH, writable=True),
+        new_batch_sizer(),
+        LocalEmbedder() if embed_backend == "local" else None,
+        inflight
+    )
+    job_slots = asyncio.Semaphore(max(1, max_jobs))
+    results: Dict[str, Dict] = {}
+
+    async def run(job: IngestJob, ingestor: RepositoryIngestor):
+        async with job_slots:
+            started = time.time()
+            try:
+                async with ingestor:
+                    await ingestor.ingest_repository(job.repo)
+                results[job.collection] = {"status": "ok"}
+            except Exception as e:
+                print(f"❌ Job {job.repo} -> {job.collection} failed: {e}")
+                results[job.collection] = {"status": "failed", "error": str(e)}
+            results[job.collection].update(repo=job.repo, elapsed_s=round(time.time() - started, 3),
+                                           report=ingestor.metrics.last_report)
+
+    async with pool:
+        ingestors = [
+            RepositoryIngestor(qdrant_url, embed_url, job.collection, incremental=not job.full,
+                               workers=job.workers, executor_kind=executor_kind, profile=job.profile, pool=pool)
+            for job in jobs
+        ]
+        for ingestor in ingestors:
+            ingestor.metrics.report_path = ""  # one combined report below instead of one per job
+
+        print("⏳ Waiting for services...")
+        async with ingestors[0]:
+            await ingestors[0].wait_for_services()
+
+        await asyncio.gather(*(run(job, ingestor) for job, ingestor in zip(jobs, ingestors)))
+
+    print(f"\n🗂️  Jobs finished ({pool.limiter.limit} shared embed slots):")
+    for job in jobs:
+        result = results[job.collection]
+        print(f"   {'✅' if result['status'] == 'ok' else '❌'} {job.repo} -> {job.collection}: "
+              f"{result['elapsed_s']:.1f}s, {pool.limiter.granted.get(job.collection, 0)} embed requests")
+
+    if report_path:
+        path = pathlib.Path(report_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": results, "embed_requests": pool.limiter.granted}, f, indent=2)
+        os.replace(tmp_path, path)
+        print(f"📝 Run report written to {path}")
+
+    return all(result["status"] == "ok" for result in results.values())
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="RECON multi-repository ingestion")
+    parser.add_argument("job_file", help="JSON file of repo -> collection jobs")
+    parser.add_argument("--max-jobs", type=int, default=MAX_JOBS,
+                        help="Repositories ingested at the same time")
+    parser.add_argument("--inflight", type=int, default=EMBED_INFLIGHT,
+                        help="Embed requests in flight across all jobs")
+    parser.add_argument("--executor", choices=["process", "thread"], default=INGEST_EXECUTOR,
+                        help="Worker pool type for reading and chunking")
+    parser.add_argument("--embed-backend", choices=["http", "local"], default=EMBED_BACKEND,
+                        help="Embed via the embedder service or with the model loaded in-process")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.job_file)
+    if not jobs:
+        print(f"⚠️  No jobs in {args.job_file}")
+        return
+
+    print(f"🗂️  {len(jobs)} jobs, {args.max_jobs} at a time, {args.inflight} shared embed slots:")
+    for job in jobs:
+        print(f"   {job.repo} -> {job.collection} ({job.profile}{', full' if job.full else ''})")
+    print()
+
+    ok = await run_jobs(
+        jobs,
+        os.getenv("QDRANT_URL", "http://localhost:6333"),
+        os.getenv("EMBED_URL", "http://localhost:8081/embed"),
+        args.embed_backend, args.executor, args.max_jobs, args.inflight
+    )
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# RECON Snapshot - Collection export/import
+# Dump a collection's ids, vectors and payloads to disk and bulk-load them into another Qdrant, no embedding needed
+
+import os
+import gzip
+import json
+import time
+import pathlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Batch, Distance, VectorParams
+
+from chunk_store import ChunkStore, open_chunk_store
+from collection_profiles import COLLECTION_PROFILE, PROFILES, create_collection
+
+SNAPSHOT_VERSION = 1
+EXPORT_PAGE = int(os.getenv("EXPORT_PAGE", "1000"))  # points per scroll request
+IMPORT_BATCH = int(os.getenv("IMPORT_BATCH", "512"))  # points per upsert
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "4"))  # concurrent upserts
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "")  # chunk text of points whose payloads leave it out
+
+META_FILE = "meta.json"
+IDS_FILE = "ids.npy"
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"  # per-vector scale for int8 snapshots
+PAYLOADS_FILE = "payloads.jsonl.gz"
+TEXTS_FILE = "texts.jsonl.gz"  # chunk text by text_hash, for points stored without payload text
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 quantization; returns (codes, scales)."""
+    scales = np.abs(vectors).max(axis=1).astype(np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None] * 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * (scales[:, None] / 127)
+
+
+def parse_id(point_id: str) -> Union[int, str]:
+    """Ids are stored as text; Qdrant accepts unsigned integers or UUID strings."""
+    return int(point_id) if point_id.isdigit() else point_id
+
+
+def export_collection(client: QdrantClient, collection: str, out_dir: pathlib.Path, dtype: str = "float32",
+                      chunk_store: Optional[ChunkStore] = None):
+    """Stream every point of a collection into a snapshot directory.
+
+    Points ingested with a chunk store have no text in their payload; their
+    texts are copied from chunk_store, once per text_hash, so the snapshot
+    is self-contained.
+    """
+    info = client.get_collection(collection)
+    params = info.config.params.vectors
+    if not isinstance(params, VectorParams):
+        raise ValueError(f"Collection {collection} uses named vectors, which snapshots do not support")
+
+    total = client.count(collection, exact=True).count
+    dimension = params.size
+    out_dir.mkdir(parents=True, exist_ok=True)
+    print(f"📤 Exporting {total} points ({dimension} dims, {dtype}) from {collection} to {out_dir}")
+
+    ids = np.lib.format.open_memmap(out_dir / IDS_FILE, mode="w+", dtype="<U36", shape=(total,))
+    vectors = np.lib.format.open_memmap(out_dir / VECTORS_FILE, mode="w+", dtype=dtype, shape=(total, dimension))
+    scales = (np.lib.format.open_memmap(out_dir / SCALES_FILE, mode="w+", dtype=np.float32, shape=(total,))
+              if dtype == "int8" else None)
+
+    written = 0
+    texts_written = 0
+    missing_texts = 0
+    exported_hashes = set()
+    started = time.time()
+    offset = None
+    with gzip.open(out_dir / PAYLOADS_FILE, "wt", encoding="utf-8") as payloads, \
+            gzip.open(out_dir / TEXTS_FILE, "wt", encoding="utf-8") as texts:
+        while written < total:
+            records, offset = client.scroll(
+                collection_name=collection, limit=min(EXPORT_PAGE, total - written), offset=offset,
+                with_payload=True, with_vectors=True
+            )
+            if not records:
+                break
+
+            end = written + len(records)
+            page = np.asarray([record.vector for record in records], dtype=np.float32)
+            if scales is not None:
+                vectors[written:end], scales[written:end] = quantize_int8(page)
+            else:
+                vectors[written:end] = page
+            ids[written:end] = [str(record.id) for record in records]
+            for record in records:
+                payloads.write(json.dumps(record.payload, ensure_ascii=False) + "\n")
+
+            # Texts kept outside the payloads
+            hashes = {record.payload["text_hash"] for record in records
+                      if "text" not in record.payload and "text_hash" in record.payload}
+            hashes = sorted(hashes - exported_hashes)
+            if hashes and chunk_store is None:
+                raise ValueError(f"Points of {collection} keep their text in a chunk store; "
+                                 f"set CHUNK_STORE_PATH or pass --chunk-store")
+            for text_hash, text in zip(hashes, chunk_store.get_many(hashes) if hashes else []):
+                if text is None:
+                    missing_texts += 1
+                    continue
+                texts.write(json.dumps({"text_hash": text_hash, "text": text}, ensure_ascii=False) + "\n")
+                texts_written += 1
+            exported_hashes.update(hashes)
+
+            written = end
+            if offset is None:
+                break
+            if written % (EXPORT_PAGE * 10) == 0:
+                print(f"   Exported {written}/{total} points...")
+
+    for array in (ids, vectors, scales):
+        if array is not None:
+            array.flush()
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "collection": collection,
+        "count": written,  # rows actually filled, in case points were deleted mid-export
+        "dimension": dimension,
+        "distance": params.distance.value if hasattr(params.distance, "value") else str(params.distance),
+        "dtype": dtype,
+        "texts": texts_written,
+        "exported_at": time.time()
+    }
+    with open(out_dir / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    if missing_texts:
+        print(f"⚠️  {missing_texts} chunk texts were not in the chunk store; those points will have no text")
+    print(f"✅ Exported {written} points and {texts_written} chunk texts in {time.time() - started:.1f}s")
+
+
+def read_snapshot(snapshot_dir: pathlib.Path) -> Tuple[Dict, Iterator[Tuple[List, np.ndarray, List[Dict]]]]:
+    """Snapshot metadata plus a lazy iterator of (ids, float32 vectors, payloads) batches."""
+    with open(snapshot_dir / META_FILE, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta.get('version')} in {snapshot_dir}")
+
+    count = meta["count"]
+    ids = np.load(snapshot_dir / IDS_FILE, mmap_mode="r")
+    vectors = np.load(snapshot_dir / VECTORS_FILE, mmap_mode="r")
+    scales = np.load(snapshot_dir / SCALES_FILE, mmap_mode="r") if meta["dtype"] == "int8" else None
+
+    def batches():
+        with gzip.open(snapshot_dir / PAYLOADS_FILE, "rt", encoding="utf-8") as payloads:
+            for start in range(0, count, IMPORT_BATCH):
+                end = min(start + IMPORT_BATCH, count)
+                block = np.asarray(vectors[start:end])
+                if scales is not None:
+                    block = dequantize_int8(block, np.asarray(scales[start:end]))
+                yield (
+                    [parse_id(str(point_id)) for point_id in ids[start:end]],
+                    block.astype(np.float32, copy=False),
+                    [json.loads(line) for line in islice(payloads, end - start)]
+                )
+
+    return meta, batches()
+
+
+def read_texts(snapshot_dir: pathlib.Path) -> Iterator[Tuple[str, str]]:
+    """(text_hash, text) pairs exported for points stored without payload text."""
+    if not (snapshot_dir / TEXTS_FILE).exists():
+        return
+    with gzip.open(snapshot_dir / TEXTS_FILE, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            yield entry["text_hash"], entry["text"]
+
+
+def import_snapshot(client: QdrantClient, collection: str, snapshot_dir: pathlib.Path,
+                    workers: int = IMPORT_WORKERS, recreate: bool = False, profile: str = COLLECTION_PROFILE,
+                    chunk_store: Optional[ChunkStore] = None):
+    """Bulk-load a snapshot with concurrent batched upserts.
+
+    Exported chunk texts go into chunk_store before any point is upserted,
+    as the ingestor does; without a store they are put back into the
+    payloads instead (held in memory while importing).
+    """
+    meta, batches = read_snapshot(snapshot_dir)
+    print(f"📥 Importing {meta['count']} points ({meta['dimension']} dims, {meta['dtype']}) into {collection}")
+    inline_texts: Dict[str, str] = {}
+    if meta.get("texts"):
+        if chunk_store:
+            stored = chunk_store.put_many(read_texts(snapshot_dir))
+            print(f"🗄️  Restored {meta['texts']} chunk texts to the chunk store ({stored} new)")
+        else:
+            inline_texts = dict(read_texts(snapshot_dir))
+            print(f"🗄️  No chunk store configured, putting {len(inline_texts)} chunk texts back into payloads")
+
+    exists = collection in [c.name for c in client.get_collections().collections]
+    if exists and recreate:
+        client.delete_collection(collection)
+        exists = False
+    if not exists:
+        create_collection(client, collection, meta["dimension"], profile, Distance(meta["distance"]))
+    elif client.get_collection(collection).config.params.vectors.size != meta["dimension"]:
+        raise ValueError(f"Collection {collection} exists with a different vector size than the snapshot")
+
+    def upsert(batch: Tuple[List, np.ndarray, List[Dict]]) -> int:
+        batch_ids, block, payloads = batch
+        if inline_texts:
+            for payload in payloads:
+                if "text" not in payload and payload.get("text_hash") in inline_texts:
+                    payload["text"] = inline_texts[payload["text_hash"]]
+        client.upsert(
+            collection_name=collection,
+            points=Batch(ids=batch_ids, vectors=block.tolist(), payloads=payloads)
+        )
+        return len(batch_ids)
+
+    loaded = 0
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Keep only a few batches in flight so memory stays bounded
+        in_flight = []
+        for batch_num, batch in enumerate(batches, start=1):
+            in_flight.append(executor.submit(upsert, batch))
+            if len(in_flight) >= workers * 2:
+                loaded += in_flight.pop(0).result()
+            if batch_num % 20 == 0:
+                print(f"   Imported {loaded}/{meta['count']} points...")
+        for future in in_flight:
+            loaded += future.result()
+
+    elapsed = time.time() - started
+    print(f"✅ Imported {loaded} points in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):.0f} points/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RECON collection snapshots")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subcommands.add_parser("export", help="Dump a collection to a snapshot directory")
+    export_parser.add_argument("snapshot_dir")
+    export_parser.add_argument("--dtype", choices=["float32", "int8"], default="float32",
+                               help="Vector storage type (int8 is 4x smaller, near-lossless for cosine)")
+
+    import_parser = subcommands.add_parser("import", help="Bulk-load a snapshot directory")
+    import_parser.add_argument("snapshot_dir")
+    import_parser.add_argument("--workers", type=int, default=IMPORT_WORKERS,
+                               help="Concurrent upsert requests")
+    import_parser.add_argument("--recreate", action="store_true",
+                               help="Drop the collection first if it exists")
+    import_parser.add_argument("--profile", choices=sorted(PROFILES), default=COLLECTION_PROFILE,
+                               help="Collection profile used if the collection has to be created")
+
+    for sub in (export_parser, import_parser):
+        sub.add_argument("--collection", default=os.getenv("COLLECTION", "sovereignty-arch"))
+        sub.add_argument("--chunk-store", default=CHUNK_STORE_PATH,
+                         help="Chunk store holding text left out of payloads (\"\" = text is in payloads)")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    snapshot_dir = pathlib.Path(args.snapshot_dir)
+
+    chunk_store = open_chunk_store(args.chunk_store, writable=args.command == "import")
+    try:
+        if args.command == "export":
+            export_collection(client, args.collection, snapshot_dir, args.dtype, chunk_store)
+        else:
+            import_snapshot(client, args.collection, snapshot_dir, args.workers, args.recreate, args.profile,
+                            chunk_store)
+    finally:
+        if chunk_store:
+            chunk_store.close()
+
+
+if __name__ == "__main__":
+    main()
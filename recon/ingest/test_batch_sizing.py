@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# RECON Ingest - Batch sizing tests
+# Which embedder failures shrink the request window
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from batch_sizing import AdaptiveBatchSizer
+
+
+def test_isolated_single_text_failure_keeps_limits():
+    sizer = AdaptiveBatchSizer(64, 100000)
+    sizer.failure(1, time.monotonic(), overload=False)
+    assert (sizer.texts_limit, sizer.chars_limit) == (64, 100000)
+    assert sizer.failures == 1
+
+
+@pytest.mark.parametrize("texts,overload", [(1, True), (8, False), (8, True)])
+def test_overload_or_batch_failure_halves_limits(texts, overload):
+    sizer = AdaptiveBatchSizer(64, 100000)
+    sizer.failure(texts, time.monotonic(), overload)
+    assert (sizer.texts_limit, sizer.chars_limit) == (32, 50000)
+
+
+@pytest.mark.parametrize("status,shrinks", [(400, False), (413, False), (422, False), (429, True), (503, True)])
+def test_embed_request_status_decides_backoff(make_ingestor, status, shrinks):
+    ingestor = make_ingestor()
+    limits = (ingestor.batch_sizer.texts_limit, ingestor.batch_sizer.chars_limit)
+
+    async def main():
+        ingestor.session = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(status)))
+        with pytest.raises(httpx.HTTPStatusError):
+            await ingestor.post_embeddings(["one bad text"])
+        await ingestor.session.aclose()
+
+    asyncio.run(main())
+    assert ((ingestor.batch_sizer.texts_limit, ingestor.batch_sizer.chars_limit) != limits) == shrinks
+
+
+def test_embed_timeout_backs_off(make_ingestor):
+    ingestor = make_ingestor()
+    limits = (ingestor.batch_sizer.texts_limit, ingestor.batch_sizer.chars_limit)
+
+    def timeout(request):
+        raise httpx.ReadTimeout("embedder too slow", request=request)
+
+    async def main():
+        ingestor.session = httpx.AsyncClient(transport=httpx.MockTransport(timeout))
+        with pytest.raises(httpx.TimeoutException):
+            await ingestor.post_embeddings(["one text"])
+        await ingestor.session.aclose()
+
+    asyncio.run(main())
+    assert ingestor.batch_sizer.texts_limit < limits[0] and ingestor.batch_sizer.chars_limit < limits[1]
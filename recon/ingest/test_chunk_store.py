@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# RECON Ingest - Chunk store tests
+# Texts come back by hash across reopen, compaction and a concurrent reader
+
+import chunk_store
+from chunk_store import INDEX_ENTRY, ChunkStore
+from dedup import text_hash
+
+TEXTS = ["def alpha():\n    return 1\n", "ünïcödé text ✓", "x" * 5000, ""]
+
+
+def items(texts):
+    return [(text_hash(text), text) for text in texts]
+
+
+def test_round_trip_and_unknown_hashes(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks"), writable=True)
+    assert store.put_many(items(TEXTS)) == len(TEXTS)
+    assert store.get_many([text_hash(text) for text in TEXTS]) == TEXTS
+    assert store.get_many([text_hash("never stored")]) == [None]
+    store.close()
+
+
+def test_duplicates_are_stored_once(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks"), writable=True)
+    assert store.put_many(items(TEXTS + TEXTS)) == len(TEXTS)
+    assert store.put_many(items(TEXTS[:2])) == 0
+    assert store.count == len(TEXTS)
+    store.close()
+
+
+def test_reopen_and_reader_see_written_texts(tmp_path):
+    path = str(tmp_path / "chunks")
+    writer = ChunkStore(path, writable=True)
+    writer.put_many(items(TEXTS[:2]))
+    reader = ChunkStore(path)
+    writer.put_many(items(TEXTS[2:]))
+    assert reader.get_many([text_hash(text) for text in TEXTS]) == TEXTS  # picks up later appends
+    writer.close()
+
+    reopened = ChunkStore(path, writable=True)
+    assert reopened.get_many([text_hash(text) for text in TEXTS]) == TEXTS
+    assert reopened.put_many(items(TEXTS)) == 0
+    reopened.close()
+
+
+def test_compacted_index_still_finds_texts(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunk_store, "TAIL_LIMIT", 10)
+    texts = [f"chunk number {i}" for i in range(50)]
+    store = ChunkStore(str(tmp_path / "chunks"), writable=True)
+    for i in range(0, len(texts), 7):
+        store.put_many(items(texts[i:i + 7]))
+    assert len(store.keys) > 0
+    assert store.get_many([text_hash(text) for text in texts]) == texts
+    store.close()
+
+    reopened = ChunkStore(str(tmp_path / "chunks"))
+    assert reopened.get_many([text_hash(text) for text in reversed(texts)]) == texts[::-1]
+
+
+def test_torn_index_entry_is_dropped(tmp_path):
+    path = str(tmp_path / "chunks")
+    store = ChunkStore(path, writable=True)
+    store.put_many(items(TEXTS[:2]))
+    store.close()
+    with open(f"{path}.idx", "ab") as f:
+        f.write(b"\x00" * (INDEX_ENTRY.size // 2))  # crash mid-append
+
+    store = ChunkStore(path, writable=True)
+    store.put_many(items(TEXTS[2:]))
+    assert store.get_many([text_hash(text) for text in TEXTS]) == TEXTS
+    store.close()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# RECON Ingest - Chunking tests
+# Syntax-aware packing with the word chunker, so no tokenizer download is needed
+
+import re
+
+import pytest
+
+from chunking import WordChunker, _brace_depths, _brace_units, code_units, pack_units, split_lines
+
+PYTHON_SOURCE = '''import os
+import sys
+
+CONSTANT = 1
+
+
+@decorator
+def first(a, b):
+    """Adds things up."""
+    total = a + b
+    return total
+
+
+@one
+@two(option=True)
+def second(values):
+    # a comment inside
+    return [value * 2 for value in values]
+
+
+class Widget:
+    """A widget with a few methods."""
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def label(self):
+        return self.name.upper()
+
+    def render(self, width, height):
+        lines = []
+        for row in range(height):
+            lines.append("*" * width)
+        return "\\n".join(lines)
+
+
+# Leading comment that belongs to third
+def third():
+    return first(1, 2) + second([3])
+'''
+
+BRACE_SOURCE = '''/* header { not a block */
+import { thing } from "./thing";
+
+/*
+ * multi-line comment with a stray {
+ */
+function alpha(x) {
+    if (x > 1) {
+        return x * 2;
+    }
+    return x;
+}
+
+class Counter {
+    #count = 0;
+    #bump() {
+        this.#count += 1;
+    }
+    get value() {
+        if (this.#count) { return this.#count; }
+        return 0;
+    }
+}
+
+function omega(y) {
+    const s = "braces { in } strings";
+    return y + s.length;
+}
+'''
+
+
+def words(text):
+    return len(re.findall(r"\S+", text))
+
+
+def covered(text, spans):
+    """Indices of non-whitespace characters that no span covers."""
+    inside = bytearray(len(text))
+    for start, end in spans:
+        inside[start:end] = b"\x01" * (end - start)
+    return [i for i, ch in enumerate(text) if not ch.isspace() and not inside[i]]
+
+
+def definition(text, first_line, last_line):
+    """Text of lines [first_line, last_line) with trailing whitespace trimmed."""
+    return "".join(split_lines(text)[first_line:last_line]).strip()
+
+
+@pytest.mark.parametrize("text,extension", [
+    (PYTHON_SOURCE, ".py"),
+    (BRACE_SOURCE, ".js"),
+    ("plain words " * 500, ".md"),
+])
+@pytest.mark.parametrize("chunk_size", [8, 25, 60, 400])
+def test_spans_cover_every_character(text, extension, chunk_size):
+    spans = WordChunker(chunk_size, chunk_size // 4).spans(text, extension)
+    assert spans == sorted(spans)
+    assert covered(text, spans) == []
+
+
+@pytest.mark.parametrize("text,extension", [(PYTHON_SOURCE, ".py"), (BRACE_SOURCE, ".js")])
+@pytest.mark.parametrize("chunk_size", [8, 25, 60])
+def test_packed_chunks_fit_chunk_size(text, extension, chunk_size):
+    chunker = WordChunker(chunk_size, 2)
+    units = code_units(text, extension)
+    spans = pack_units(text, units, chunker.offsets(text), chunk_size, 2)
+    assert spans
+    assert max(words(text[start:end]) for start, end in spans) <= chunk_size
+
+
+def test_python_definitions_stay_whole():
+    spans = WordChunker(40, 5).spans(PYTHON_SOURCE, ".py")
+    chunks = [PYTHON_SOURCE[start:end] for start, end in spans]
+    lines = split_lines(PYTHON_SOURCE)
+
+    def block(opening):
+        first = next(i for i, line in enumerate(lines) if line.startswith(opening))
+        last = next((i for i in range(first + 1, len(lines))
+                     if lines[i].strip() and not lines[i][0].isspace()), len(lines))
+        return definition(PYTHON_SOURCE, first, last)
+
+    for opening in ("@decorator", "@one", "# Leading comment"):
+        assert any(block(opening) in chunk for chunk in chunks), opening
+
+
+def test_python_units_start_at_decorators():
+    units = code_units(PYTHON_SOURCE, ".py")
+    starts = [split_lines(PYTHON_SOURCE)[unit.first] for unit in units]
+    assert "@decorator\n" in starts
+    assert "@one\n" in starts
+    assert "def second(values):\n" not in starts
+
+
+def test_brace_comments_and_private_names_keep_depth():
+    lines = split_lines(BRACE_SOURCE)
+    depths = _brace_depths(lines)
+
+    assert depths[0] == (0, 0)  # /* header { not a block */
+    assert all(depth == 0 for depth, _ in depths[3:6])  # multi-line comment with a stray {
+    assert depths[lines.index("    #bump() {\n")][0] == 2
+    assert depths[lines.index("        if (this.#count) { return this.#count; }\n")] == (2, 3)
+    assert depths[-1][0] == 0
+
+
+def test_brace_units_split_at_top_level_blocks():
+    lines = split_lines(BRACE_SOURCE)
+    units = _brace_units(lines, _brace_depths(lines), 0, len(lines), 0)
+    blocks = [definition(BRACE_SOURCE, unit.first, unit.last) for unit in units]
+
+    for name in ("function alpha", "class Counter", "function omega"):
+        block = next(block for block in blocks if name in block)
+        assert block.rstrip().endswith("}"), name
+        assert sum(name in other for other in blocks) == 1
+
+    counter = next(unit for unit in units if "class Counter" in definition(BRACE_SOURCE, unit.first, unit.last))
+    methods = [definition(BRACE_SOURCE, child.first, child.last) for child in counter.children()]
+    assert len(methods) > 1
+    for opening in ("#bump() {", "get value() {"):
+        assert any(opening in method and method.endswith("}") for method in methods), opening
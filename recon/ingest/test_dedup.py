@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# RECON Ingest - Deduplication tests
+# Duplicate chunks reuse one embedding, even once the LRU has moved on
+
+import asyncio
+
+import ingest
+from conftest import stored_paths, write_files
+from dedup import EmbeddingDeduper
+
+
+def test_claimed_vector_survives_eviction():
+    async def main():
+        deduper = EmbeddingDeduper(capacity=1)
+        must_embed, first = deduper.claim("a")
+        assert must_embed
+        deduper.resolve("a", [1.0, 0.0])
+
+        must_embed, again = deduper.claim("a")  # known: reused
+        assert not must_embed
+        deduper.claim("b")
+        deduper.resolve("b", [0.0, 1.0])  # evicts "a"
+        assert "a" not in deduper.vectors
+        assert (await first).tolist() == (await again).tolist() == [1.0, 0.0]
+
+    asyncio.run(main())
+
+
+def test_waiters_share_pending_embedding_or_failure():
+    async def main():
+        deduper = EmbeddingDeduper()
+        _, owner = deduper.claim("a")
+        must_embed, waiter = deduper.claim("a")
+        assert not must_embed and waiter is owner
+        deduper.resolve("a", [0.5])
+        assert (await waiter).tolist() == [0.5]
+
+        deduper.claim("b")
+        _, waiter = deduper.claim("b")
+        deduper.fail(["b"], RuntimeError("embedder down"))
+        assert isinstance(waiter.exception(), RuntimeError)
+        assert deduper.claim("b")[0]  # a failed text is embedded again by the next claim
+
+    asyncio.run(main())
+
+
+def test_evicted_duplicates_are_still_uploaded(make_ingestor, qdrant, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(ingest, "EmbeddingDeduper", lambda: EmbeddingDeduper(capacity=1))
+    monkeypatch.setattr(ingest, "BATCH_SIZE", 1)
+    repo_root = tmp_path / "repo"
+    shared = "shared boilerplate " * 40
+    write_files(repo_root, {f"doc{i}.md": shared if i % 2 else f"document {i} " * 40 for i in range(12)})
+
+    asyncio.run(make_ingestor().ingest_repository(str(repo_root)))
+    assert len(stored_paths(qdrant)) == 12
+    assert "queued for retry" not in capsys.readouterr().out
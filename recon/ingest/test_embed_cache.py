@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# RECON Ingest - Embedding cache tests
+
+from embed_cache import EmbeddingCache
+
+
+def test_size_counts_distinct_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), "model")
+    cache.put_many(["a", "b"], [[1.0], [2.0]])
+    cache.put_many(["a", "b", "c", "c"], [[1.5], [2.0], [3.0], [3.0]])
+
+    assert cache.size == 3
+    assert cache.stats()["entries"] == 3
+    assert cache.get_many(["a", "c"]) == [[1.5], [3.0]]
+    cache.close()
+    assert EmbeddingCache(str(tmp_path / "cache.sqlite"), "model").size == 3
+
+
+def test_rewrites_do_not_trigger_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), "model", max_entries=10)
+    texts = [f"text {i}" for i in range(10)]
+    cache.put_many(texts, [[float(i)] for i in range(10)])
+
+    def evict():
+        raise AssertionError("evicted a cache that is not over its limit")
+
+    cache.evict = evict
+    for _ in range(4):
+        cache.put_many(texts, [[float(i)] for i in range(10)])
+
+    assert cache.size == 10
+    assert cache.get_many(texts) == [[float(i)] for i in range(10)]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# RECON Ingest - Git delta tests
+# Runs after the first one take only what git reports as changed, plus gitignored files
+
+import asyncio
+import subprocess
+
+import pytest
+
+import ingest
+from conftest import stored_paths, write_files
+
+
+def git(repo_root, *args):
+    subprocess.run(["git", "-C", str(repo_root), "-c", "user.name=test", "-c", "user.email=test@example.com",
+                    *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo_root = tmp_path / "repo"
+    write_files(repo_root, {
+        ".gitignore": "generated/\n*.local.md\n",
+        "a.md": "alpha " * 60,
+        "b.md": "beta " * 60,
+        "notes.local.md": "local notes " * 30,
+        "generated/api.md": "generated api " * 30,
+    })
+    git(repo_root, "init", "-q")
+    git(repo_root, "add", ".")
+    git(repo_root, "commit", "-q", "-m", "initial")
+    return repo_root
+
+
+@pytest.fixture
+def ingest_run(make_ingestor, monkeypatch):
+    """Ingest once and report whether the run went through a git delta."""
+    deltas = []
+    changes_since = ingest.changes_since
+
+    def recording_changes_since(repo_root, commit):
+        delta = changes_since(repo_root, commit)
+        deltas.append(delta)
+        return delta
+
+    monkeypatch.setattr(ingest, "changes_since", recording_changes_since)
+
+    def run(repo_root) -> bool:
+        deltas.clear()
+        asyncio.run(make_ingestor().ingest_repository(str(repo_root)))
+        return bool(deltas) and deltas[-1] is not None
+
+    return run
+
+
+def test_first_run_indexes_ignored_files(repo, qdrant, ingest_run):
+    assert not ingest_run(repo)
+    assert stored_paths(qdrant) == ["a.md", "b.md", "generated/api.md", "notes.local.md"]
+
+
+def test_rename_moves_points_without_embedding(repo, qdrant, ingest_run, make_ingestor):
+    ingest_run(repo)
+    git(repo, "mv", "a.md", "renamed.md")
+    git(repo, "commit", "-q", "-m", "rename")
+    embedded = len(make_ingestor.embedded)
+
+    assert ingest_run(repo)
+    assert stored_paths(qdrant) == ["b.md", "generated/api.md", "notes.local.md", "renamed.md"]
+    assert len(make_ingestor.embedded) == embedded
+
+
+def test_untracked_file_is_indexed(repo, qdrant, ingest_run):
+    ingest_run(repo)
+    write_files(repo, {"new.md": "brand new " * 40})
+
+    assert ingest_run(repo)
+    assert "new.md" in stored_paths(qdrant)
+
+
+def test_reverted_edit_is_reindexed(repo, qdrant, ingest_run, make_ingestor):
+    ingest_run(repo)
+    write_files(repo, {"b.md": "edited " * 60})
+    assert ingest_run(repo)
+    assert any(text.startswith("edited") for text in make_ingestor.embedded)
+
+    git(repo, "checkout", "--", "b.md")  # back to the committed content; HEAD never moved
+    embedded = len(make_ingestor.embedded)
+    assert ingest_run(repo)
+    assert any(text.startswith("beta") for text in make_ingestor.embedded[embedded:])
+
+
+def test_ignored_files_follow_edits_and_deletes(repo, qdrant, ingest_run, make_ingestor):
+    ingest_run(repo)
+    write_files(repo, {"notes.local.md": "rewritten notes " * 30, "generated/extra.md": "extra " * 30})
+    assert ingest_run(repo)
+    assert any(text.startswith("rewritten") for text in make_ingestor.embedded)
+    assert "generated/extra.md" in stored_paths(qdrant)
+
+    (repo / "notes.local.md").unlink()
+    (repo / "generated" / "api.md").unlink()
+    assert ingest_run(repo)
+    assert stored_paths(qdrant) == ["a.md", "b.md", "generated/extra.md"]
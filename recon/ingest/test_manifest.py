@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# RECON Ingest - Manifest tests
+# Incremental bookkeeping: the ingestor's own files, and which points a run may delete
+
+import json
+import asyncio
+
+import pytest
+
+import ingest
+from conftest import stored_paths, write_files
+
+DOCS = {"a.md": "alpha " * 60, "b.md": "beta " * 60}
+
+
+def test_state_files_inside_repo_are_not_indexed(make_ingestor, qdrant, tmp_path):
+    repo_root = tmp_path / "repo"
+    write_files(repo_root, DOCS)
+
+    def make():
+        ingestor = make_ingestor(manifest_path=repo_root / "test.manifest.json")
+        ingestor.metrics.report_path = str(repo_root / "report.json")
+        ingestor.state_files = ingestor.own_files()
+        return ingestor
+
+    asyncio.run(make().ingest_repository(str(repo_root)))
+    assert (repo_root / "test.manifest.json").exists() and (repo_root / "report.json").exists()
+
+    ingestor = make()
+    asyncio.run(ingestor.ingest_repository(str(repo_root)))
+    assert stored_paths(qdrant) == ["a.md", "b.md"]
+    assert not ingestor.is_relevant(repo_root / "test.manifest.json", repo_root)
+    assert ingestor.is_relevant(repo_root / "a.md", repo_root)
+
+
+def test_watch_ignores_own_manifest_saves(make_ingestor, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "WATCH_DEBOUNCE_MS", 200)
+    monkeypatch.setattr(ingest, "WATCH_QUIET_MS", 50)
+    repo_root = (tmp_path / "repo").resolve()
+    write_files(repo_root, DOCS)
+    ingestor = make_ingestor(manifest_path=repo_root / "test.manifest.json")
+    updates = []
+    ingest_paths = ingestor.ingest_paths
+
+    async def counting_ingest_paths(root, paths):
+        paths = list(paths)
+        updates.append(sorted(str(path.relative_to(root)) for path in paths))
+        await ingest_paths(root, paths)
+
+    ingestor.ingest_paths = counting_ingest_paths
+
+    async def main():
+        watcher = asyncio.create_task(ingestor.watch_repository(str(repo_root)))
+        await asyncio.sleep(1.0)
+        (repo_root / "a.md").write_text("alpha changed " * 60)
+        await asyncio.sleep(2.0)
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+
+    asyncio.run(main())
+    assert updates == [["a.md"]]
+
+
+def test_other_repository_is_refused(make_ingestor, qdrant, tmp_path):
+    write_files(tmp_path / "repo_a", DOCS)
+    write_files(tmp_path / "repo_b", {"c.md": "gamma " * 60})
+    asyncio.run(make_ingestor().ingest_repository(str(tmp_path / "repo_a")))
+
+    with pytest.raises(ValueError, match="indexed from"):
+        asyncio.run(make_ingestor().ingest_repository(str(tmp_path / "repo_b")))
+    assert stored_paths(qdrant) == ["a.md", "b.md"]
+
+    # The same repository through another spelling of its path is fine
+    asyncio.run(make_ingestor().ingest_repository(str(tmp_path / "repo_b" / ".." / "repo_a")))
+    assert stored_paths(qdrant) == ["a.md", "b.md"]
+
+
+def test_manifest_without_repo_is_adopted(make_ingestor, qdrant, tmp_path):
+    repo_root = tmp_path / "repo"
+    write_files(repo_root, DOCS)
+    ingestor = make_ingestor()
+    asyncio.run(ingestor.ingest_repository(str(repo_root)))
+
+    data = json.loads(ingestor.manifest_path.read_text())
+    del data["repo"]  # written before manifests recorded their repository
+    ingestor.manifest_path.write_text(json.dumps(data))
+
+    embedded = len(make_ingestor.embedded)
+    ingestor = make_ingestor()
+    asyncio.run(ingestor.ingest_repository(str(repo_root)))
+    assert len(make_ingestor.embedded) == embedded
+    assert json.loads(ingestor.manifest_path.read_text())["repo"] == str(repo_root.resolve())
+
+
+def test_full_run_deletes_chunks_of_removed_files(make_ingestor, qdrant, tmp_path):
+    repo_root = tmp_path / "repo"
+    write_files(repo_root, DOCS)
+    asyncio.run(make_ingestor().ingest_repository(str(repo_root)))
+
+    (repo_root / "b.md").unlink()
+    asyncio.run(make_ingestor(incremental=False).ingest_repository(str(repo_root)))
+    assert stored_paths(qdrant) == ["a.md"]
+
+
+def test_unreadable_manifest_prunes_untracked_points(make_ingestor, qdrant, tmp_path):
+    repo_root = tmp_path / "repo"
+    write_files(repo_root, DOCS)
+    ingestor = make_ingestor()
+    asyncio.run(ingestor.ingest_repository(str(repo_root)))
+
+    ingestor.manifest_path.write_text("{not json")
+    (repo_root / "b.md").unlink()
+    asyncio.run(make_ingestor().ingest_repository(str(repo_root)))
+    assert stored_paths(qdrant) == ["a.md"]
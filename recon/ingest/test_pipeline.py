@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# RECON Ingest - Pipeline shutdown tests
+# A failed or cancelled stage must not leave another stage blocked on a full queue
+
+import asyncio
+import pathlib
+
+import pytest
+
+import ingest
+from conftest import write_files
+
+TIMEOUT = 10
+
+
+def make_repo(root: pathlib.Path, count: int = 40) -> pathlib.Path:
+    write_files(root, {f"doc{i}.md": f"document {i} " * 40 for i in range(count)})
+    return root
+
+
+def stages(ingestor, repo_root: pathlib.Path, consumer):
+    """discover -> chunk -> consumer over queues of size 1, so upstream stages block on put."""
+    file_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    run = ingest.IngestRun(ingestor.load_manifest())
+    return (
+        ingestor.discover_stage(ingestor.iter_files(repo_root), file_queue),
+        ingestor.chunk_stage(repo_root, file_queue, chunk_queue, run),
+        consumer(chunk_queue)
+    )
+
+
+def test_failing_consumer_stops_pipeline(make_ingestor, tmp_path):
+    repo_root = make_repo(tmp_path / "repo")
+    ingestor = make_ingestor()
+
+    async def failing_consumer(chunk_queue):
+        await chunk_queue.get()
+        await asyncio.sleep(0.05)  # let the upstream stages fill their queues
+        raise RuntimeError("upload failed")
+
+    async def main():
+        await asyncio.wait_for(ingest.run_pipeline(*stages(ingestor, repo_root, failing_consumer)), TIMEOUT)
+
+    with pytest.raises(RuntimeError, match="upload failed"):
+        asyncio.run(main())
+
+
+def test_cancelled_pipeline_stops(make_ingestor, tmp_path):
+    repo_root = make_repo(tmp_path / "repo")
+    ingestor = make_ingestor()
+
+    async def stalled_consumer(chunk_queue):
+        await chunk_queue.get()
+        await asyncio.Event().wait()
+
+    async def main():
+        task = asyncio.create_task(ingest.run_pipeline(*stages(ingestor, repo_root, stalled_consumer)))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        done, _ = await asyncio.wait([task], timeout=TIMEOUT)
+        assert done, "pipeline did not stop after cancel"
+        assert task.cancelled()
+
+    asyncio.run(main())
+
+
+def test_failed_upload_stage_saves_checkpoint(make_ingestor, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "QUEUE_SIZE", 1)
+    monkeypatch.setattr(ingest, "BATCH_SIZE", 1)
+    repo_root = make_repo(tmp_path / "repo")
+    ingestor = make_ingestor()
+
+    async def failing_upload(chunk_queue, checkpoint=None):
+        await chunk_queue.get()
+        await asyncio.sleep(0.05)
+        raise RuntimeError("qdrant down")
+
+    ingestor.upload_chunks_batched = failing_upload
+
+    async def main():
+        await asyncio.wait_for(ingestor.ingest_repository(str(repo_root)), TIMEOUT)
+
+    with pytest.raises(RuntimeError, match="qdrant down"):
+        asyncio.run(main())
+    assert ingestor.checkpoint_path.exists()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# RECON Ingest - Vector codec tests
+# Binary /embed payloads decode to what the embedder packed
+
+import httpx
+import numpy as np
+import pytest
+
+from vector_codec import (
+    HEADER, MEDIA_TYPE, accept_header, decode_embeddings, negotiate, pack_vectors, unpack_vectors
+)
+
+VECTORS = np.random.default_rng(0).standard_normal((5, 384)).astype(np.float32)
+
+
+def test_float32_round_trip_is_exact():
+    data = pack_vectors(VECTORS)
+    assert len(data) == HEADER.size + VECTORS.nbytes
+    decoded = unpack_vectors(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, VECTORS)
+
+
+def test_float16_round_trip_is_close():
+    data = pack_vectors(VECTORS, "float16")
+    assert len(data) == HEADER.size + VECTORS.size * 2
+    decoded = unpack_vectors(data)
+    assert decoded.dtype == np.float32 and decoded.shape == VECTORS.shape
+    np.testing.assert_allclose(decoded, VECTORS, rtol=1e-3, atol=1e-3)
+
+
+def test_empty_batch_round_trips():
+    assert unpack_vectors(pack_vectors(np.empty((0, 0), dtype=np.float32))).shape == (0, 0)
+
+
+@pytest.mark.parametrize("data", [b"RVE", b"XVEC" + pack_vectors(VECTORS)[4:], pack_vectors(VECTORS)[:4] + b"\x09"])
+def test_bad_payloads_are_rejected(data):
+    with pytest.raises(ValueError):
+        unpack_vectors(data)
+
+
+@pytest.mark.parametrize("wire_format,dtype", [("float32", "float32"), ("float16", "float16"), ("json", None)])
+def test_accept_header_negotiates_back(wire_format, dtype):
+    assert negotiate(accept_header(wire_format)) == dtype
+
+
+def test_negotiate_ignores_unknown_dtypes_and_other_types():
+    assert negotiate(None) is None
+    assert negotiate("application/json") is None
+    assert negotiate(f"{MEDIA_TYPE}; dtype=int8") is None
+    assert negotiate(MEDIA_TYPE) == "float32"
+
+
+def test_decode_embeddings_reads_both_formats():
+    binary = httpx.Response(200, content=pack_vectors(VECTORS), headers={"content-type": f"{MEDIA_TYPE}; dtype=float32"})
+    json_response = httpx.Response(200, json={"embeddings": VECTORS.tolist()})
+    np.testing.assert_array_equal(decode_embeddings(binary), VECTORS)
+    np.testing.assert_array_equal(decode_embeddings(json_response), VECTORS)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# RECON Vector codec - compact binary /embed responses
+# Shared by the embedder (encode) and its clients, the ingestor and the retriever (decode)
+
+import os
+import struct
+from typing import Optional
+
+import numpy as np
+
+MEDIA_TYPE = "application/x-recon-vectors"
+MAGIC = b"RVEC"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")  # magic, version, dtype code, reserved, rows, dimensions
+DTYPES = {"float32": 1, "float16": 2}
+NUMPY_DTYPES = {1: "<f4", 2: "<f2"}
+
+EMBED_WIRE_FORMAT = os.getenv("EMBED_WIRE_FORMAT", "float32")  # "float32", "float16" or "json"
+
+
+def accept_header(wire_format: str = EMBED_WIRE_FORMAT) -> str:
+    """Accept header asking for binary vectors, with JSON as the fallback older servers send."""
+    if wire_format == "json":
+        return "application/json"
+    return f"{MEDIA_TYPE}; dtype={wire_format}, application/json; q=0.5"
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """The binary dtype a client accepts, or None if it only takes JSON."""
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type.lower() != MEDIA_TYPE:
+            continue
+        options = dict(param.split("=", 1) for param in params if "=" in param)
+        dtype = options.get("dtype", "float32").strip().lower()
+        return dtype if dtype in DTYPES else None
+    return None
+
+
+def pack_vectors(vectors: np.ndarray, dtype: str = "float32") -> bytes:
+    """Header plus the row-major little-endian matrix."""
+    code = DTYPES[dtype]
+    matrix = np.ascontiguousarray(vectors, dtype=NUMPY_DTYPES[code])
+    rows, dimensions = matrix.shape if matrix.ndim == 2 else (0, 0)
+    return HEADER.pack(MAGIC, VERSION, code, 0, rows, dimensions) + matrix.tobytes()
+
+
+def unpack_vectors(data: bytes) -> np.ndarray:
+    """float32 matrix from pack_vectors() output."""
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated vector payload")
+    magic, version, code, _, rows, dimensions = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or code not in NUMPY_DTYPES:
+        raise ValueError(f"Unsupported vector payload (magic {magic!r}, version {version}, dtype {code})")
+
+    matrix = np.frombuffer(data, dtype=NUMPY_DTYPES[code], count=rows * dimensions, offset=HEADER.size)
+    return matrix.reshape(rows, dimensions).astype(np.float32, copy=False)
+
+
+def decode_embeddings(response) -> np.ndarray:
+    """Vectors from an httpx /embed response in either format."""
+    content_type = response.headers.get("content-type", "")
+    if content_type.split(";")[0].strip().lower() == MEDIA_TYPE:
+        return unpack_vectors(response.content)
+    return np.asarray(response.json()["embeddings"], dtype=np.float32)
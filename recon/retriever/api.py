@@ -3,8 +3,10 @@
 # Fast semantic search and LLM-augmented responses
 
 import os
+import sys
 import time
 import asyncio
+import pathlib
 from typing import List, Dict, Optional
 from datetime import datetime
 
@@ -17,6 +19,12 @@ from qdrant_client.http.exceptions import UnexpectedResponse
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
 from fastapi.responses import Response
 
+# The embedding cache module lives with the ingestor so both share one format
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "ingest"))
+from embed_cache import open_cache
+from chunk_store import open_chunk_store
+from vector_codec import accept_header, decode_embeddings
+
 # Configuration
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 COLLECTION = os.getenv("COLLECTION", "sovereignty-arch")
@@ -24,12 +32,16 @@ LLM_URL = os.getenv("LLM_URL", "http://localhost:8080")
 EMBED_URL = os.getenv("EMBED_URL", "http://localhost:8081/embed")
 MAX_CONTEXT_LENGTH = int(os.getenv("MAX_CONTEXT_LENGTH", "4000"))
 RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.7"))
+EMBED_MODEL = os.getenv("EMBED_MODEL", "bge-small-en-v1.5")
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")  # shared on-disk cache; "" = in-memory only
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "")  # where the ingestor keeps chunk text; "" = in payloads
 
 # Metrics
 QUERY_COUNTER = Counter('rag_queries_total', 'Total RAG queries', ['collection', 'status'])
 QUERY_DURATION = Histogram('rag_query_duration_seconds', 'Query processing time', ['operation'])
 CONTEXT_RELEVANCE = Gauge('rag_context_relevance_score', 'Average context relevance score')
 EMBEDDING_CACHE_HITS = Counter('rag_embedding_cache_hits_total', 'Embedding cache hits')
+EMBEDDING_CACHE_MISSES = Counter('rag_embedding_cache_misses_total', 'Embedding cache misses')
 
 # Initialize FastAPI
 app = FastAPI(
@@ -51,6 +63,8 @@ app.add_middleware(
 qdrant_client = QdrantClient(url=QDRANT_URL)
 httpx_client = None
 embedding_cache = {}  # Simple in-memory cache
+disk_cache = open_cache(EMBED_MODEL, EMBED_CACHE_PATH)  # Persistent cache shared with the ingestor
+chunk_store = open_chunk_store(CHUNK_STORE_PATH)  # Read-only view of the ingestor's chunk texts
 
 # Request/Response Models
 class QueryRequest(BaseModel):
@@ -103,6 +117,10 @@ async def shutdown_event():
     global httpx_client
     if httpx_client:
         await httpx_client.aclose()
+    if disk_cache:
+        disk_cache.close()
+    if chunk_store:
+        chunk_store.close()
     print("👋 RECON RAG API shutdown")
 
 # Helper Functions
@@ -114,20 +132,31 @@ async def get_embedding(text: str) -> List[float]:
         EMBEDDING_CACHE_HITS.inc()
         return embedding_cache[cache_key]
     
+    if disk_cache:
+        cached = disk_cache.get_many([text])[0]
+        if cached is not None:
+            EMBEDDING_CACHE_HITS.inc()
+            if len(embedding_cache) < 1000:
+                embedding_cache[cache_key] = cached
+            return cached
+    
+    EMBEDDING_CACHE_MISSES.inc()
     try:
         response = await httpx_client.post(
             EMBED_URL,
             json={"texts": [text]},
+            headers={"Accept": accept_header()},
             timeout=30
         )
         response.raise_for_status()
         
-        embeddings = response.json()["embeddings"]
-        embedding = embeddings[0]
+        embedding = decode_embeddings(response)[0].tolist()
         
         # Cache with size limit
         if len(embedding_cache) < 1000:
             embedding_cache[cache_key] = embedding
+        if disk_cache:
+            disk_cache.put_many([text], [embedding])
         
         return embedding
         
@@ -163,10 +192,20 @@ async def search_contexts(query_vector: List[float], collection: str, k: int,
             score_threshold=min_score
         )
         
-        # Convert to ContextResult objects
+        # Convert to ContextResult objects, collapsing identical chunks from mirrored files
         contexts = []
-        for hit in search_result[:k]:  # Take top k after filtering
-            contexts.append(ContextResult(
+        missing_text: List[tuple] = []  # (context, text_hash) whose text lives in the chunk store
+        by_text_hash: Dict[str, ContextResult] = {}
+        for hit in search_result:
+            text_hash = hit.payload.get("text_hash")
+            if text_hash and text_hash in by_text_hash:
+                by_text_hash[text_hash].metadata["duplicate_paths"].append(hit.payload.get("path", "unknown"))
+                continue
+            
+            if len(contexts) == k:  # Take top k after filtering
+                continue
+            
+            context = ContextResult(
                 path=hit.payload.get("path", "unknown"),
                 chunk=hit.payload.get("chunk", 0),
                 score=hit.score,
@@ -174,9 +213,24 @@ async def search_contexts(query_vector: List[float], collection: str, k: int,
                 metadata={
                     "extension": hit.payload.get("extension", ""),
                     "file_size": hit.payload.get("file_size", 0),
-                    "total_chunks": hit.payload.get("total_chunks", 1)
+                    "total_chunks": hit.payload.get("total_chunks", 1),
+                    "duplicate_paths": []
                 }
-            ))
+            )
+            for key in ("page", "heading"):  # location within extracted PDF/HTML documents
+                if key in hit.payload:
+                    context.metadata[key] = hit.payload[key]
+            contexts.append(context)
+            if text_hash:
+                by_text_hash[text_hash] = context
+                if "text" not in hit.payload:
+                    missing_text.append((context, text_hash))
+        
+        # One bulk lookup for just the top-k texts
+        if chunk_store and missing_text:
+            texts = chunk_store.get_many([text_hash for _, text_hash in missing_text])
+            for (context, _), text in zip(missing_text, texts):
+                context.text = text or ""
         
         return contexts
         